@@ -1,14 +1,20 @@
 import os
-import requests
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import queue
 import time
 import threading
-import pandas as pd
-from urllib.parse import parse_qs
+
+from ncbi_fetcher import InputReader, SequenceFetcher
+from ncbi_fetcher.inputs import count_lines, preview_lines
+
+UI_TICK_MS = 100  # Interval pengurasan antrian event UI
+UI_MAX_EVENTS = 5000  # Batas event per tick agar GUI tetap responsif
+LOG_MAX_LINES = 2000  # Baris yang disimpan di widget log; log lengkap ada di file
+LOG_FILENAME = "ncbi_fetcher.log"
+PREVIEW_LINES = 200  # File besar tidak dimuat utuh ke widget, hanya pratinjau
 
 
 class NCBISequenceFetcher:
@@ -24,35 +30,70 @@ class NCBISequenceFetcher:
         self.batch_mode = tk.BooleanVar(value=False)
         self.running = False
         self.filename_template = tk.StringVar(value="{accession}_{organism}.{ext}")
+        self.batch_size = tk.IntVar(value=200)  # Accessions per efetch request
+        self.workers = tk.IntVar(value=3)
+        self.api_key = tk.StringVar()
+        self.use_cache = tk.BooleanVar(value=True)
+        self.revalidate_cache = tk.BooleanVar(value=False)
+        self.redownload = tk.BooleanVar(value=False)  # Abaikan journal dan katalog folder output
+        self.cache_size_mb = tk.IntVar(value=2048)
+        self.query_term = tk.StringVar()  # Entrez query; bila diisi, URL diabaikan
+
+        # Worker threads hanya menaruh event di sini; main loop yang menggambar
+        self.events = queue.Queue()
+        self.log_file = None
+        self.log_file_path = None
 
         # Batch state management
         self.completed_urls = []
+        self.input_files = []  # File yang di-import; dibaca bertahap saat download
         self.folder_cache_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "last_folder.json")
-        self.batch_state_file = "batch_state.json"
         self.metadata_file = "ncbi_metadata.xlsx"
 
-        # Metadata columns
-        self.metadata_columns = [
-            'Accession', 'Version', 'Strain', 'Organism', 'Taxonomy',
-            'Country', 'Collection_Date', 'Collected_By', 'Isolation_Source',
-            'Product', 'Definition', 'Length', 'Filename', 'Downloaded'
-        ]
-        self.init_metadata()
+        # Fetch/parse/save engine
+        self.engine = SequenceFetcher(metadata_file=self.metadata_file, log=self.log)
 
         # Load last folder
         self.load_last_folder()
 
         # UI Setup
         self.setup_ui()
+        self.root.after(UI_TICK_MS, self.process_events)
+
+    def read_settings(self):
+        """Membaca semua nilai widget di main thread; worker hanya menerima nilai biasa."""
+        batch_mode = self.batch_mode.get()
+        return {
+            'output_folder': self.output_folder.get(),
+            'report_type': self.report_type.get(),
+            'filename_template': self.filename_template.get(),
+            'batch_size': self.batch_size.get(),
+            'workers': self.workers.get(),
+            'api_key': self.api_key.get(),
+            'use_cache': self.use_cache.get(),
+            'revalidate_cache': self.revalidate_cache.get(),
+            'cache_size_mb': self.cache_size_mb.get(),
+            'resume': not self.redownload.get(),
+            'query_term': self.query_term.get().strip(),
+            'batch_mode': batch_mode,
+            'url': self.ncbi_url.get().strip(),
+            'input_files': list(self.input_files),
+            'batch_text': self.batch_url_text.get(1.0, tk.END) if batch_mode and not self.input_files else '',
+            'metadata_file': self.metadata_file,
+        }
 
-    def init_metadata(self):
-        if os.path.exists(self.metadata_file):
-            try:
-                self.metadata_df = pd.read_excel(self.metadata_file)
-            except Exception:
-                self.metadata_df = pd.DataFrame(columns=self.metadata_columns)
-        else:
-            self.metadata_df = pd.DataFrame(columns=self.metadata_columns)
+    def sync_engine(self, settings):
+        """Menyalin pengaturan yang sudah dibaca dari widget ke engine sebelum download."""
+        self.engine.output_folder = settings['output_folder']
+        self.engine.report_type = settings['report_type']
+        self.engine.filename_template = settings['filename_template']
+        self.engine.batch_size = settings['batch_size']
+        self.engine.workers = settings['workers']
+        self.engine.api_key = settings['api_key']
+        self.engine.use_cache = settings['use_cache']
+        self.engine.revalidate_cache = settings['revalidate_cache']
+        self.engine.cache_size_mb = settings['cache_size_mb']
+        self.engine.set_metadata_file(settings['metadata_file'])
 
     def setup_ui(self):
         main_frame = ttk.Frame(self.root, padding=10)
@@ -78,12 +119,23 @@ class NCBISequenceFetcher:
         self.batch_url_text.pack(fill=tk.BOTH, expand=True)
         self.batch_url_text.pack_forget()  # Hidden by default
 
+        query_frame = ttk.Frame(main_frame)
+        query_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(query_frame, text="Entrez Query (optional):").pack(side=tk.LEFT)
+        ttk.Entry(query_frame, textvariable=self.query_term).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, padx=5, pady=5)
 
         ttk.Label(control_frame, text="Format:").pack(side=tk.LEFT)
         ttk.OptionMenu(control_frame, self.report_type, "fasta", "fasta", "genbank").pack(side=tk.LEFT, padx=5)
 
+        ttk.Label(control_frame, text="Batch Size:").pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Spinbox(control_frame, from_=1, to=500, textvariable=self.batch_size, width=5).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(control_frame, text="Workers:").pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Spinbox(control_frame, from_=1, to=10, textvariable=self.workers, width=3).pack(side=tk.LEFT, padx=5)
+
         ttk.Label(control_frame, text="Filename Template:").pack(side=tk.LEFT, padx=(20, 0))
         ttk.Entry(control_frame, textvariable=self.filename_template, width=30).pack(side=tk.LEFT)
 
@@ -91,6 +143,16 @@ class NCBISequenceFetcher:
         ttk.Entry(control_frame, textvariable=self.output_folder, width=30).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         ttk.Button(control_frame, text="Browse", command=self.browse_folder).pack(side=tk.LEFT)
 
+        key_frame = ttk.Frame(main_frame)
+        key_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(key_frame, text="NCBI API Key (optional):").pack(side=tk.LEFT)
+        ttk.Entry(key_frame, textvariable=self.api_key, width=40, show="*").pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(key_frame, text="Use Cache", variable=self.use_cache).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(key_frame, text="Revalidate Versions", variable=self.revalidate_cache).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(key_frame, text="Re-download Existing", variable=self.redownload).pack(side=tk.LEFT, padx=5)
+        ttk.Label(key_frame, text="Cache Size (MB):").pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Spinbox(key_frame, from_=0, to=1048576, textvariable=self.cache_size_mb, width=8).pack(side=tk.LEFT, padx=5)
+
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
 
@@ -99,6 +161,7 @@ class NCBISequenceFetcher:
         ttk.Button(button_frame, text="Clear", command=self.clear_urls).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Import URLs", command=self.import_urls).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Export URLs", command=self.export_urls).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Export Metadata", command=self.export_metadata_threaded).pack(side=tk.LEFT, padx=5)
 
         self.progress_var = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(main_frame, orient="horizontal",
@@ -124,7 +187,13 @@ class NCBISequenceFetcher:
     def start_download_threaded(self):
         if self.running:
             return
-        threading.Thread(target=self.start_download, daemon=True).start()
+        try:
+            settings = self.read_settings()
+        except tk.TclError as e:
+            messagebox.showerror("Error", f"Invalid setting: {str(e)}")
+            return
+        self.running = True
+        threading.Thread(target=self.start_download, args=(settings,), daemon=True).start()
 
     def toggle_batch_mode(self):
         if self.batch_mode.get():
@@ -167,24 +236,36 @@ class NCBISequenceFetcher:
             self.output_folder.set(folder)
             self.save_last_folder(folder)
             self.metadata_file = os.path.join(folder, "ncbi_metadata.xlsx")
-            self.batch_state_file = os.path.join(folder, "batch_state.json")
+            self.engine.set_metadata_file(self.metadata_file)
             self.log("Output folder set to: " + folder)
 
     def clear_urls(self):
         if self.batch_mode.get():
+            self.input_files = []
+            self.batch_url_text.config(state=tk.NORMAL)
             self.batch_url_text.delete(1.0, tk.END)
         else:
             self.ncbi_url.set("")
 
     def import_urls(self):
-        filepath = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
-        if filepath:
-            with open(filepath, 'r') as f:
-                if self.batch_mode.get():
-                    self.batch_url_text.insert(tk.END, f.read())
-                else:
-                    first_line = f.readline().strip()
-                    self.ncbi_url.set(first_line)
+        filepath = filedialog.askopenfilename(filetypes=[("Accession lists", "*.txt *.gz"), ("All files", "*.*")])
+        if not filepath:
+            return
+        if not self.batch_mode.get():
+            lines, _ = preview_lines(filepath, 1)
+            self.ncbi_url.set(lines[0].strip() if lines else "")
+            return
+        # Hanya pratinjau; isi file dibaca bertahap oleh engine saat download
+        self.input_files.append(filepath)
+        lines, more = preview_lines(filepath, PREVIEW_LINES)
+        self.batch_url_text.config(state=tk.NORMAL)
+        if len(self.input_files) == 1:
+            self.batch_url_text.delete(1.0, tk.END)
+        self.batch_url_text.insert(tk.END, f"# {os.path.basename(filepath)}\n" + "\n".join(lines) + "\n")
+        if more:
+            self.batch_url_text.insert(tk.END, f"# ... preview only, first {PREVIEW_LINES} lines shown\n")
+        self.batch_url_text.config(state=tk.DISABLED)
+        self.log(f"Imported {filepath} (streamed at download time; Clear to edit by hand)")
 
     def export_urls(self):
         if not self.batch_mode.get():
@@ -193,300 +274,198 @@ class NCBISequenceFetcher:
         filepath = filedialog.asksaveasfilename(defaultextension=".txt",
                                               filetypes=[("Text files", "*.txt")])
         if filepath:
-            with open(filepath, 'w') as f:
-                f.write(self.batch_url_text.get(1.0, tk.END))
+            if self.input_files:
+                # Accession kanonik tanpa duplikat, ditulis per baris
+                reader = InputReader(self.input_files)
+                with open(filepath, 'w') as f:
+                    for accession in reader:
+                        f.write(accession + "\n")
+                self.log(reader.summary())
+            else:
+                with open(filepath, 'w') as f:
+                    f.write(self.batch_url_text.get(1.0, tk.END))
             self.log(f"URLs exported to: {filepath}")
 
     def log(self, message, tag=None):
         timestamp = datetime.now().strftime("%H:%M:%S")
         full_message = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, full_message, tag)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self.events.put(('log', full_message, tag))
 
     def update_progress(self, current, total):
-        self.progress_var.set(current)
-        self.progress_bar["maximum"] = total
-        self.progress_label.config(text=f"Processed {current}/{total}")
-        self.status_var.set(f"Processing {current}/{total}")
-        self.root.update_idletasks()
+        self.events.put(('progress', current, total))
 
     def update_status(self, status):
-        self.root.after(0, self.status_var.set, status)
+        self.events.put(('status', status))
 
-    def start_download(self):
-        if self.running:
-            return
+    def call_in_ui(self, func, *args):
+        self.events.put(('call', func, args))
+
+    def process_events(self):
+        """Menguras antrian event dari worker pada setiap tick main loop."""
+        pending_logs = []
         try:
-            self.running = True
-            if self.batch_mode.get():
-                self.download_batch()
-            else:
-                self.download_single()
-        except Exception as e:
-            self.root.after(0, messagebox.showerror, "Error", f"Operation failed: {str(e)}")
-            self.log(f"ERROR: {str(e)}", tag="failure_tag")
+            for _ in range(UI_MAX_EVENTS):
+                event = self.events.get_nowait()
+                kind = event[0]
+                if kind == 'log':
+                    pending_logs.append(event[1:])
+                    continue
+                if pending_logs:
+                    self.write_log(pending_logs)
+                    pending_logs = []
+                if kind == 'progress':
+                    current, total = event[1:]
+                    self.progress_var.set(current)
+                    self.progress_bar["maximum"] = total
+                    self.progress_label.config(text=f"Processed {current}/{total}")
+                    self.status_var.set(f"Processing {current}/{total}")
+                elif kind == 'status':
+                    self.status_var.set(event[1])
+                elif kind == 'call':
+                    func, args = event[1:]
+                    func(*args)
+        except queue.Empty:
+            pass
         finally:
-            self.running = False
-            self.root.after(0, self.update_status, "Ready")
+            if pending_logs:
+                self.write_log(pending_logs)
+            self.root.after(UI_TICK_MS, self.process_events)
+
+    def write_log(self, entries):
+        self.write_log_file(entries)
+        # Baris yang toh akan langsung dipangkas tidak perlu dimasukkan ke widget
+        for message, tag in entries[-LOG_MAX_LINES:]:
+            self.log_text.insert(tk.END, message, tag)
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        self.log_text.see(tk.END)
 
-    def download_single(self):
-        url = self.ncbi_url.get().strip()
+    def write_log_file(self, entries):
+        path = os.path.join(self.output_folder.get(), LOG_FILENAME)
+        try:
+            if path != self.log_file_path:
+                if self.log_file is not None:
+                    self.log_file.close()
+                self.log_file = open(path, 'a', encoding='utf-8')
+                self.log_file_path = path
+            self.log_file.writelines(message for message, _ in entries)
+            self.log_file.flush()
+        except OSError:
+            self.log_file = None
+            self.log_file_path = None
+
+    def download_single(self, url):
         if not url:
-            self.root.after(0, messagebox.showwarning, "Warning", "Please enter a valid NCBI URL")
+            self.call_in_ui(messagebox.showwarning, "Warning", "Please enter a valid NCBI URL")
             return
         try:
             start_time = time.time()
             self.log(f"STARTING: {url}")
-            filename = self.process_url(url)
+            filename = self.engine.process_url(url)
             duration = time.time() - start_time
             self.log(f"COMPLETED in {duration:.2f}s: {filename}", tag="success_tag")
-            self.root.after(0, messagebox.showinfo, "Success", "Download completed!")
+            self.engine.export_metadata()
+            self.call_in_ui(messagebox.showinfo, "Success", "Download completed!")
         except Exception as e:
             self.log(f"FAILED: {str(e)}", tag="failure_tag")
             raise
 
-    def download_batch(self):
-        all_urls = self.get_urls_from_batch()
-        if not all_urls:
-            self.root.after(0, messagebox.showwarning, "Warning", "No valid URLs found!")
+    def download_batch(self, settings):
+        inputs, total = self.get_urls_from_batch(settings)
+        if not total:
+            self.call_in_ui(messagebox.showwarning, "Warning", "No valid URLs found!")
             return
         self.completed_urls = []
-        total = len(all_urls)
         start_time = time.time()
-        self.log(f"\n=== BATCH STARTED: {total} URLs ===")
+        self.log(f"\n=== BATCH STARTED: ~{total} URLs ===")
         self.update_progress(0, total)
 
+        def on_progress(done, total, completed_urls):
+            self.completed_urls = completed_urls
+            self.update_progress(done, total)
+
         try:
-            for i, url in enumerate(all_urls, 1):
-                if url in self.completed_urls:
-                    continue
-                try:
-                    filename = self.process_url_with_retry(url)
-                    self.completed_urls.append(url)
-                    duration = time.time() - start_time
-                    self.log(f"COMPLETED in {duration:.2f}s: {filename}", tag="success_tag")
-                except Exception as e:
-                    self.log(f"FAILED: {url} - {str(e)}", tag="failure_tag")
-                self.update_progress(i, total)
-                self.save_batch_state(self.completed_urls, all_urls)
-                time.sleep(1)  # Rate limiting
+            self.completed_urls = self.engine.download_batch(inputs, on_progress=on_progress, total=total,
+                                                             resume=settings['resume'])
         except Exception as e:
             self.log(f"BATCH ERROR: {str(e)}", tag="failure_tag")
             raise
         finally:
+            self.engine.export_metadata()
+            self.engine.log_cache_stats()
+            self.engine.write_metrics()
+            self.log(inputs.summary(), tag="failure_tag" if inputs.invalid else None)
+            for sample in inputs.invalid_samples:
+                self.log(f"Invalid URL skipped: {sample}")
             duration_total = time.time() - start_time
             success = len(self.completed_urls)
+            total = inputs.unique + inputs.invalid
             self.log(f"=== BATCH COMPLETED: {success}/{total} in {duration_total:.2f}s ===")
             if success == total:
-                self.clear_batch_state()
-                self.root.after(0, messagebox.showinfo, "Complete", f"Successfully processed {total} URLs")
+                self.call_in_ui(messagebox.showinfo, "Complete", f"Successfully processed {total} URLs")
             else:
-                self.root.after(0, messagebox.showinfo, "Partial Complete",
+                self.call_in_ui(messagebox.showinfo, "Partial Complete",
                                 f"Processed {success}/{total} URLs. Failed {total - success}.")
 
-    def process_url_with_retry(self, url, max_retries=3):
-        for attempt in range(max_retries):
-            try:
-                return self.process_url(url)
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                wait_time = 2 ** attempt
-                self.log(f"Retry {attempt+1} for {url} in {wait_time}s...", tag="failure_tag")
-                time.sleep(wait_time)
-
-    def get_urls_from_batch(self):
-        text = self.batch_url_text.get(1.0, tk.END).strip()
-        urls = [url.strip() for url in text.split('\n') if url.strip()]
-        valid_urls = []
-        for url in urls:
-            try:
-                if '/nuccore/' in url:
-                    accession_id = url.split('/nuccore/')[-1].split('?')[0].strip()
-                    base_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=nuccore&id= {accession_id}&rettype={self.report_type.get()}&retmode=text"
-                    valid_urls.append(base_url)
-                elif url.startswith(("https://www.ncbi.nlm.nih.gov/ ", "http://www.ncbi.nlm.nih.gov/")):
-                    valid_urls.append(url)
-                else:
-                    self.log(f"Invalid URL skipped: {url}")
-            except Exception as e:
-                self.log(f"Error parsing URL: {url} - {str(e)}")
-        return valid_urls
-
-    def process_url(self, url):
-        # Parse accession ID dari semua jenis URL
-        if '/nuccore/' in url:
-            accession_id = url.split('/nuccore/')[-1].split("?")[0].strip()
-        elif '?' in url and 'id=' in url:
-            query_string = url.split('?', 1)[1]
-            params = parse_qs(query_string)
-            accession_id = params.get('id', [''])[0].strip()
-        elif url.startswith(("https://www.ncbi.nlm.nih.gov/ ", "http://www.ncbi.nlm.nih.gov/")):
-            parts = url.split('/')
-            accession_id = parts[-1].split("?")[0].strip()
-        else:
-            raise ValueError("Invalid NCBI URL format")
-
-        if not accession_id:
-            raise ValueError("Could not extract accession ID")
-
-        ext = self.report_type.get()
-        api_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=nuccore&id= {accession_id}&rettype={ext}&retmode=text"
-        headers = {
-            'User-Agent': 'Mozilla/5.0',
-            'Accept': 'text/plain'
-        }
-
-        response = requests.get(api_url, headers=headers, timeout=15)
-        response.raise_for_status()
-
-        metadata = self.extract_metadata(accession_id)
-        filename = self.save_data(response.text, metadata, ext)
-        self.save_metadata(metadata, filename)
-        return filename
-
-    def extract_metadata(self, accession_id):
-        metadata = {
-            'Accession': accession_id,
-            'Version': 'NA',
-            'Strain': 'NA',
-            'Organism': 'NA',
-            'Taxonomy': 'NA',
-            'Country': 'NA',
-            'Collection_Date': 'NA',
-            'Collected_By': 'NA',
-            'Isolation_Source': 'NA',
-            'Product': 'NA',
-            'Definition': 'NA',
-            'Length': 'NA',
-            'Downloaded': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        try:
-            api_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=nuccore&id= {accession_id}&rettype=gb&retmode=text"
-            response = requests.get(api_url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-            response.raise_for_status()
-            lines = response.text.split('\n')
-
-            for line in lines:
-                if line.startswith('VERSION'):
-                    metadata['Version'] = line.split()[1].strip()
-                elif line.startswith('DEFINITION'):
-                    metadata['Definition'] = line[12:].strip()
-                elif line.startswith('  ORGANISM'):
-                    metadata['Organism'] = line[12:].strip()
-                elif '/strain=' in line:
-                    metadata['Strain'] = self.extract_value(line, 'strain')
-                elif '/country=' in line or '/geo_loc_name=' in line:
-                    field = 'country' if '/country=' in line else 'geo_loc_name'
-                    metadata['Country'] = self.extract_value(line, field)
-                elif '/collection_date=' in line:
-                    metadata['Collection_Date'] = self.extract_value(line, 'collection_date')
-                elif '/collected_by=' in line:
-                    metadata['Collected_By'] = self.extract_value(line, 'collected_by')
-                elif '/isolation_source=' in line:
-                    metadata['Isolation_Source'] = self.extract_value(line, 'isolation_source')
-                elif '/product=' in line:
-                    metadata['Product'] = self.extract_value(line, 'product')
-                elif line.startswith('LOCUS'):
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        metadata['Length'] = parts[2] + 'bp'
-        except Exception as e:
-            self.log(f"Metadata warning: {str(e)}")
-        return metadata
-
-    def extract_value(self, line, field_name):
-        patterns = [f'/{field_name}="', f'/{field_name}=']
-        for pattern in patterns:
-            start = line.find(pattern)
-            if start != -1:
-                start += len(pattern)
-                end = line.find('"', start) if '"' in pattern else min(
-                    line.find(' ', start),
-                    line.find('\n', start),
-                    line.find(';', start),
-                    len(line)
-                )
-                if end == -1:
-                    end = len(line)
-                return line[start:end].strip()
-        return 'NA'
-
-    def save_data(self, data, metadata, ext):
-        try:
-            filename = self.filename_template.get().format(
-                accession=metadata.get('Accession', 'unknown'),
-                organism=metadata.get('Organism', 'unknown').replace(' ', '_'),
-                strain=metadata.get('Strain', 'unknown'),
-                product=metadata.get('Product', 'unknown'),
-                length=metadata.get('Length', 'unknown'),
-                date=datetime.now().strftime('%Y%m%d'),
-                ext=ext
-            ).replace('/', '_').replace('\\', '_')
-            filename = "".join(c if c.isalnum() or c in ('_', '-', '.') else '_' for c in filename)
-            filepath = os.path.join(self.output_folder.get(), filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(data)
-            return filename
-        except Exception as e:
-            raise ValueError(f"Filename generation failed: {str(e)}")
+    def download_query(self, term, resume):
+        self.completed_urls = []
+        start_time = time.time()
+        self.log(f"\n=== QUERY STARTED: {term} ===")
+        self.update_progress(0, 1)
 
-    def save_metadata(self, metadata, filename):
-        try:
-            metadata['Filename'] = filename
-            new_row = pd.DataFrame([metadata])
-            self.metadata_df = pd.concat([self.metadata_df, new_row], ignore_index=True)
-            self.metadata_df.to_excel(self.metadata_file, index=False)
-        except Exception as e:
-            self.log(f"Metadata error: {str(e)}")
+        def on_progress(done, total, completed):
+            self.completed_urls = completed
+            self.update_progress(done, max(total, 1))
 
-    def load_batch_state(self):
-        if not self.batch_mode.get():
-            return
-        if os.path.exists(self.batch_state_file):
-            try:
-                with open(self.batch_state_file, 'r') as f:
-                    state = json.load(f)
-                    if state.get('pending_urls'):
-                        self.batch_url_text.insert(tk.END, '\n'.join(state['pending_urls']))
-                        self.log("Loaded previous batch progress. Click 'Download All' to resume.")
-            except Exception as e:
-                self.log(f"Error loading batch state: {str(e)}")
-
-    def save_batch_state(self, completed_urls, all_urls):
-        pending = [url for url in all_urls if url not in completed_urls]
+        total = 0
         try:
-            with open(self.batch_state_file, 'w') as f:
-                json.dump({
-                    "pending_urls": pending,
-                    "output_folder": self.output_folder.get()
-                }, f)
+            self.completed_urls, total = self.engine.download_query(term=term, on_progress=on_progress,
+                                                                    resume=resume)
         except Exception as e:
-            self.log(f"Error saving batch state: {str(e)}")
-
-    def clear_batch_state(self):
-        if os.path.exists(self.batch_state_file):
-            try:
-                os.remove(self.batch_state_file)
-            except:
-                pass
-
-    def start_download(self):
-        if self.running:
-            return
+            self.log(f"QUERY ERROR: {str(e)}", tag="failure_tag")
+            raise
+        finally:
+            self.engine.export_metadata()
+            self.engine.log_cache_stats()
+            self.engine.write_metrics()
+            duration_total = time.time() - start_time
+            success = len(self.completed_urls)
+            self.log(f"=== QUERY COMPLETED: {success}/{total} in {duration_total:.2f}s ===")
+        if success == total:
+            self.call_in_ui(messagebox.showinfo, "Complete", f"Successfully downloaded {total} records")
+        else:
+            self.call_in_ui(messagebox.showinfo, "Partial Complete",
+                            f"Downloaded {success}/{total} records. Failed {total - success}.")
+
+    def get_urls_from_batch(self, settings):
+        """InputReader untuk batch ini dan perkiraan jumlah baris (untuk progress)."""
+        if settings['input_files']:
+            return InputReader(settings['input_files']), count_lines(settings['input_files'])
+        lines = [line for line in settings['batch_text'].splitlines()
+                 if line.strip() and not line.lstrip().startswith('#')]
+        return InputReader(lines=lines), len(lines)
+
+    def export_metadata_threaded(self):
+        self.engine.set_metadata_file(self.metadata_file)
+        threading.Thread(target=self.engine.export_metadata, daemon=True).start()
+
+    def start_download(self, settings):
+        """Worker thread: hanya memakai ``settings``, tidak pernah membaca widget Tk."""
         try:
-            self.running = True
-            if self.batch_mode.get():
-                self.download_batch()
+            self.sync_engine(settings)
+            if settings['query_term']:
+                self.download_query(settings['query_term'], settings['resume'])
+            elif settings['batch_mode']:
+                self.download_batch(settings)
             else:
-                self.download_single()
+                self.download_single(settings['url'])
         except Exception as e:
-            self.root.after(0, messagebox.showerror, "Error", f"Operation failed: {str(e)}")
+            self.call_in_ui(messagebox.showerror, "Error", f"Operation failed: {str(e)}")
             self.log(f"ERROR: {str(e)}", tag="failure_tag")
         finally:
             self.running = False
-            self.root.after(0, self.update_status, "Ready")
+            self.update_status("Ready")
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Offline benchmarks for the fetch engine; run with ``python -m benchmarks.run``."""
@@ -0,0 +1,344 @@
+"""Local stand-in for the NCBI E-utilities, used by the offline benchmarks.
+
+Run on its own to point the CLI at it::
+
+    python -m benchmarks.mock_eutils --port 8765 --latency 0.05 --error-rate 0.1
+    python -m ncbi_fetcher --eutils-url http://127.0.0.1:8765 BM000001.1
+"""
+
+import argparse
+import functools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_SETTINGS = {
+    'latency': 0.0,        # Detik per request (rata-rata)
+    'jitter': 0.0,         # Variasi latency, +/- detik
+    'error_rate': 0.0,     # Peluang 500/502/503
+    'throttle_rate': 0.0,  # Peluang 429 dengan Retry-After
+    'retry_after': 1,
+    'seq_length': 1000,
+    'features': 1,
+    'query_count': 1000,   # Jumlah hit untuk setiap ESearch
+    'invalid_prefix': '',  # efetch dengan ID berawalan ini dijawab 400, seperti ID yang tidak dikenal
+    'truncate_rate': 0.0,  # Peluang response efetch multi-record terputus setelah record pertama
+}
+
+
+COMPLEMENT = str.maketrans('acgt', 'tgca')
+# Record lebih panjang dari ini dikirim per blok; sekuensnya berulang setiap TILE_LENGTH basa
+STREAM_LENGTH = 50000000
+TILE_LENGTH = 600000
+
+
+@functools.lru_cache(maxsize=8)
+def make_sequence(seq_length):
+    rng = random.Random(seq_length)
+    return ''.join(rng.choice('acgt') for _ in range(seq_length))
+
+
+def region_sequence(seq_length, start, stop, strand=1):
+    """Potongan ``start..stop`` (1-based, inklusif); strand 2 = reverse complement."""
+    sequence = make_sequence(seq_length)[start - 1:stop]
+    if strand == 2:
+        sequence = sequence[::-1].translate(COMPLEMENT)
+    return sequence
+
+
+def format_origin(sequence, offset=0):
+    lines = []
+    for pos in range(0, len(sequence), 60):
+        row = sequence[pos:pos + 60]
+        blocks = ' '.join(row[i:i + 10] for i in range(0, len(row), 10))
+        lines.append(f"{offset + pos + 1:>9} {blocks}\n")
+    return ''.join(lines)
+
+
+@functools.lru_cache(maxsize=8)
+def origin_lines(seq_length):
+    return format_origin(make_sequence(seq_length))
+
+
+@functools.lru_cache(maxsize=1)
+def tile_rows():
+    sequence = make_sequence(TILE_LENGTH)
+    return [' '.join(sequence[pos + i:pos + i + 10] for i in range(0, 60, 10))
+            for pos in range(0, TILE_LENGTH, 60)]
+
+
+def iter_origin(seq_length):
+    """Baris ORIGIN record sangat panjang, per blok TILE_LENGTH basa, tanpa menyimpan seluruh sekuens."""
+    rows = tile_rows()
+    for tile_start in range(0, seq_length, TILE_LENGTH):
+        length = min(TILE_LENGTH, seq_length - tile_start)
+        full = length // 60
+        lines = [f"{tile_start + i * 60 + 1:>9} {rows[i]}\n" for i in range(full)]
+        if length % 60:
+            lines.append(format_origin(make_sequence(TILE_LENGTH)[full * 60:length], tile_start + full * 60))
+        yield ''.join(lines)
+
+
+def make_record(accession, seq_length=1000, features=1, sequence=None):
+    """Satu record GenBank sintetis untuk ``accession``; ``sequence`` menggantikan sekuens bawaan."""
+    return ''.join(iter_record(accession, seq_length, features, sequence))
+
+
+def iter_record(accession, seq_length=1000, features=1, sequence=None):
+    """Seperti ``make_record``, tetapi per bagian; ORIGIN di atas STREAM_LENGTH dibuat per blok."""
+    if sequence is not None:
+        seq_length = len(sequence)
+    version = accession if '.' in accession else accession + '.1'
+    base = version.split('.')[0]
+    parts = [
+        f"LOCUS       {base:<16}{seq_length:>12} bp    DNA     linear   BCT 01-JAN-2024\n"
+        f"DEFINITION  Synthetic record {base} used by the offline benchmarks.\n"
+        f"ACCESSION   {base}\n"
+        f"VERSION     {version}\n"
+        "KEYWORDS    .\n"
+        "SOURCE      Escherichia coli\n"
+        "  ORGANISM  Escherichia coli\n"
+        "            Bacteria; Pseudomonadota; Gammaproteobacteria; Enterobacterales;\n"
+        "            Enterobacteriaceae; Escherichia.\n"
+        "FEATURES             Location/Qualifiers\n"
+        f"     source          1..{seq_length}\n"
+        '                     /organism="Escherichia coli"\n'
+        '                     /mol_type="genomic DNA"\n'
+        f'                     /strain="BENCH-{base}"\n'
+        '                     /country="Indonesia: Bogor"\n'
+        '                     /collection_date="2020-01-01"\n'
+        '                     /isolation_source="synthetic sample used to exercise\n'
+        '                     multi-line qualifiers"\n'
+    ]
+    step = max(3, seq_length // max(1, features))
+    translation = 'M' + 'ACDEFGHIKLMNPQRSTVWY' * 15
+    translation_lines = '\n'.join(
+        ' ' * 21 + translation[i:i + 58] for i in range(0, len(translation), 58))
+    for i in range(features):
+        start = i * step + 1
+        end = min(seq_length, start + step - 1)
+        parts.append(
+            f"     CDS             {start}..{end}\n"
+            f'                     /locus_tag="BENCH_{i:05d}"\n'
+            f'                     /product="hypothetical protein {i}"\n'
+            f'                     /translation="{translation_lines[21:]}"\n'
+        )
+    parts.append("ORIGIN      \n")
+    yield ''.join(parts)
+    if sequence is not None:
+        yield format_origin(sequence)
+    elif seq_length > STREAM_LENGTH:
+        yield from iter_origin(seq_length)
+    else:
+        yield origin_lines(seq_length)
+    yield "//\n\n"
+
+
+def make_fasta(accession, seq_length=1000, sequence=None):
+    sequence = (make_sequence(seq_length) if sequence is None else sequence).upper()
+    rows = '\n'.join(sequence[i:i + 70] for i in range(0, len(sequence), 70))
+    return f">{accession} Synthetic record used by the offline benchmarks\n{rows}\n\n"
+
+
+class MockEutils:
+    """Server E-utilities palsu di thread latar belakang."""
+
+    def __init__(self, host='127.0.0.1', port=0, **settings):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings.update(settings)
+        self.lock = threading.Lock()
+        self.history = {}
+        self.counts = {}
+        self.fetched = []  # ID yang dikirim efetch, berurutan
+        self.rng = random.Random(0)
+        handler = type('Handler', (MockHandler,), {'mock': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **settings):
+        with self.lock:
+            self.settings = dict(DEFAULT_SETTINGS)
+            self.settings.update(settings)
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts = {}
+            self.fetched = []
+
+    def count(self, endpoint, status):
+        with self.lock:
+            counts = self.counts.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def record_fetch(self, ids):
+        with self.lock:
+            self.fetched.extend(ids)
+
+    def draw(self):
+        """Latency dan status (None = normal) untuk satu request."""
+        with self.lock:
+            settings = self.settings
+            delay = settings['latency'] + self.rng.uniform(-settings['jitter'], settings['jitter'])
+            roll = self.rng.random()
+            if roll < settings['throttle_rate']:
+                status = 429
+            elif roll < settings['throttle_rate'] + settings['error_rate']:
+                status = self.rng.choice((500, 502, 503))
+            else:
+                status = None
+        return max(0.0, delay), status
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    mock = None
+
+    def do_GET(self):
+        self.handle_request(urlparse(self.path).query)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.handle_request(self.rfile.read(length).decode('utf-8'))
+
+    def handle_request(self, query):
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+        endpoint = urlparse(self.path).path.rstrip('/').rsplit('/', 1)[-1].replace('.fcgi', '')
+        delay, status = self.mock.draw()
+        if delay:
+            time.sleep(delay)
+        invalid = self.mock.settings['invalid_prefix']
+        if status is None and invalid and endpoint == 'efetch' and any(
+                i.startswith(invalid) for i in params.get('id', '').split(',')):
+            status = 400
+        if status is not None:
+            self.mock.count(endpoint, status)
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', str(self.mock.settings['retry_after']))
+            self.end_headers()
+            self.wfile.write(b'{"error":"injected failure"}\n')
+            return
+        handler = getattr(self, f"serve_{endpoint}", None)
+        if handler is None:
+            self.mock.count(endpoint, 404)
+            self.send_error(404)
+            return
+        self.mock.count(endpoint, 200)
+        handler(params)
+
+    def send_body(self, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def serve_efetch(self, params):
+        if 'WebEnv' in params:
+            ids = self.mock.history.get((params['WebEnv'], params.get('query_key')), [])
+            start = int(params.get('retstart', 0))
+            ids = ids[start:start + int(params.get('retmax', 20))]
+        else:
+            ids = [i for i in params.get('id', '').split(',') if i]
+        settings = self.mock.settings
+        sequence = None
+        if 'seq_start' in params:
+            start = int(params['seq_start'])
+            stop = min(int(params.get('seq_stop', settings['seq_length'])), settings['seq_length'])
+            sequence = region_sequence(settings['seq_length'], start, stop, int(params.get('strand', 1)))
+        with self.mock.lock:
+            truncate = len(ids) > 1 and self.mock.rng.random() < settings['truncate_rate']
+        if truncate:
+            # Content-Length untuk semua record, tetapi hanya record pertama yang dikirim
+            bodies = [make_record(accession, settings['seq_length'], settings['features']).encode('utf-8')
+                      for accession in ids]
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(sum(len(body) for body in bodies)))
+            self.end_headers()
+            self.wfile.write(bodies[0])
+            self.close_connection = True
+            return
+        self.mock.record_fetch(ids)
+        # Tanpa Content-Length: body ditulis per record dan koneksi ditutup di akhir
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.end_headers()
+        try:
+            for accession in ids:
+                if params.get('rettype') == 'fasta':
+                    parts = [make_fasta(accession, settings['seq_length'], sequence)]
+                else:
+                    parts = iter_record(accession, settings['seq_length'], settings['features'], sequence)
+                for part in parts:
+                    self.wfile.write(part.encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client berhenti membaca, mis. hanya anotasi sampai ORIGIN
+
+    def serve_esearch(self, params):
+        count = self.mock.settings['query_count']
+        webenv = f"MCID_{len(self.mock.history) + 1}"
+        self.mock.history[(webenv, '1')] = [f"BQ{i:06d}.1" for i in range(count)]
+        self.send_body(json.dumps({'esearchresult': {
+            'count': str(count), 'retmax': '0', 'retstart': '0',
+            'querykey': '1', 'webenv': webenv, 'idlist': []}}), 'application/json')
+
+    def serve_epost(self, params):
+        ids = [i for i in params.get('id', '').split(',') if i]
+        webenv = params.get('WebEnv') or f"MCID_{len(self.mock.history) + 1}"
+        query_key = str(sum(1 for env, _ in self.mock.history if env == webenv) + 1)
+        self.mock.history[(webenv, query_key)] = ids
+        self.send_body("<?xml version=\"1.0\" encoding=\"UTF-8\" ?>\n"
+                       f"<ePostResult><QueryKey>{query_key}</QueryKey><WebEnv>{webenv}</WebEnv></ePostResult>\n",
+                       'text/xml')
+
+    def serve_esummary(self, params):
+        ids = [i for i in params.get('id', '').split(',') if i]
+        result = {'uids': ids}
+        for accession in ids:
+            base = accession.split('.')[0]
+            result[accession] = {'caption': base, 'accessionversion': base + '.1',
+                                 'slen': self.mock.settings['seq_length']}
+        self.send_body(json.dumps({'result': result}), 'application/json')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the mock E-utilities server in the foreground.")
+    parser.add_argument("--port", type=int, default=8765)
+    for name, default in DEFAULT_SETTINGS.items():
+        parser.add_argument("--" + name.replace('_', '-'), type=type(default), default=default)
+    args = vars(parser.parse_args(argv))
+    port = args.pop('port')
+    mock = MockEutils(port=port, **args)
+    print(f"Mock E-utilities listening on {mock.url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
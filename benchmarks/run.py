@@ -0,0 +1,421 @@
+"""Benchmark harness against ``benchmarks.mock_eutils``; one child process per scenario::
+
+    python -m benchmarks.run                       # all scenarios
+    python -m benchmarks.run -s small_fasta_1k -o before.json
+    python -m benchmarks.run -o after.json --compare before.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from ncbi_fetcher import SequenceFetcher, TokenBucket
+
+from .mock_eutils import MockEutils, format_origin, make_record, make_sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULTS_FILE = "benchmark_results.json"
+# Record GenBank berbentuk nyata (virus, plasmid, contig WGS) untuk perbandingan parser
+CORPUS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+# ``rate`` menggantikan batas 3/10 request per detik NCBI; None = tanpa batas
+SCENARIOS = {
+    'small_fasta_1k': {
+        'description': "1000 small records as FASTA, 200 per request",
+        'records': 1000, 'format': 'fasta', 'batch_size': 200, 'workers': 3, 'rate': None,
+        'server': {'seq_length': 1500, 'features': 2},
+    },
+    'large_genbank_100': {
+        'description': "100 annotated 500 kb GenBank records, 10 per request",
+        'records': 100, 'format': 'genbank', 'batch_size': 10, 'workers': 3, 'rate': None,
+        'server': {'seq_length': 500000, 'features': 400},
+    },
+    'flaky_network': {
+        'description': "500 small records over a slow network with 429s and 5xx errors",
+        'records': 500, 'format': 'fasta', 'batch_size': 25, 'workers': 3, 'rate': 10,
+        'server': {'seq_length': 1500, 'features': 2, 'latency': 0.08, 'jitter': 0.05,
+                   'error_rate': 0.15, 'throttle_rate': 0.1},
+    },
+    'large_genbank_100_procs': {
+        'description': "large_genbank_100 with parsing in 3 worker processes",
+        'records': 100, 'format': 'genbank', 'batch_size': 10, 'workers': 3, 'rate': None,
+        'parse_processes': 3,
+        'server': {'seq_length': 500000, 'features': 400},
+    },
+    'ranged_chromosome': {
+        'description': "2 records of 4 Mb as FASTA, fetched in 500 kb ranges",
+        'records': 2, 'format': 'fasta', 'batch_size': 2, 'workers': 3, 'rate': None,
+        'range_size': 500000,
+        'server': {'seq_length': 4000000, 'features': 50},
+    },
+    'huge_record_stream': {
+        'description': "one ~500 MB GenBank record streamed to disk and converted to FASTA",
+        'records': 1, 'format': 'fasta', 'batch_size': 1, 'workers': 1, 'rate': None,
+        'server': {'seq_length': 400000000, 'features': 20},
+    },
+    'single_url_50': {
+        'description': "50 process_url calls, one record per request",
+        'records': 50, 'format': 'fasta', 'mode': 'process_url', 'rate': None,
+        'server': {'seq_length': 5000, 'features': 5, 'latency': 0.01},
+    },
+    'metadata_parse': {
+        'description': "extract_metadata on an in-memory 2 Mb record with 2000 features",
+        'records': 20, 'mode': 'extract_metadata',
+        'server': {'seq_length': 2000000, 'features': 2000},
+    },
+    'parser_corpus': {
+        'description': "legacy line loop vs parse_genbank on the corpus and a 2 Mb record built from it",
+        'records': 10, 'mode': 'parser_compare', 'scaled_length': 2000000,
+        'server': {},
+    },
+}
+
+
+class BenchFetcher(SequenceFetcher):
+    """SequenceFetcher yang mencatat latency setiap request HTTP, tanpa waktu tunggu rate limiter."""
+
+    def __init__(self, rate=None, **kwargs):
+        self.local = threading.local()
+        super().__init__(**kwargs)
+        self.rate = rate
+        self.latencies = []
+        self.failures = 0
+
+    def configure_rate_limit(self):
+        # Tanpa batas: token praktis selalu tersedia
+        self.rate_limiter = TokenBucket(self.rate or 1e9)
+        acquire = self.rate_limiter.acquire
+
+        def timed_acquire(*args, **kwargs):
+            waited = acquire(*args, **kwargs)
+            self.local.waited = getattr(self.local, 'waited', 0.0) + waited
+            return waited
+        self.rate_limiter.acquire = timed_acquire
+
+    @contextmanager
+    def timed_request(self):
+        self.local.waited = 0.0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.latencies.append(time.perf_counter() - start - self.local.waited)
+
+    def post(self, name, params, timeout=60, stream=False):
+        if stream:
+            # Dihitung oleh post_stream: header plus pembacaan body saja
+            return super().post(name, params, timeout, stream)
+        with self.timed_request():
+            return super().post(name, params, timeout, stream)
+
+    @contextmanager
+    def post_stream(self, name, params, timeout=60):
+        # Waktu parse/tulis di caller tidak dihitung: hanya sampai header dan setiap baca baris
+        self.local.waited = 0.0
+        start = time.perf_counter()
+        elapsed = [0.0]
+        try:
+            with super().post_stream(name, params, timeout) as lines:
+                elapsed[0] = time.perf_counter() - start - self.local.waited
+                yield self.timed_lines(lines, elapsed)
+        finally:
+            if not elapsed[0]:
+                elapsed[0] = time.perf_counter() - start - self.local.waited
+            self.latencies.append(elapsed[0])
+
+    def timed_lines(self, lines, elapsed):
+        while True:
+            start = time.perf_counter()
+            line = next(lines, None)
+            elapsed[0] += time.perf_counter() - start
+            if line is None:
+                return
+            yield line
+
+
+def legacy_metadata(gb_text):
+    """Loop per baris yang dipakai extract_metadata sebelum parse_genbank, sebagai pembanding."""
+    metadata = {}
+    for line in gb_text.split('\n'):
+        if line.startswith('VERSION'):
+            metadata['Version'] = line.split()[1].strip()
+        elif line.startswith('DEFINITION'):
+            metadata['Definition'] = line[12:].strip()
+        elif line.startswith('  ORGANISM'):
+            metadata['Organism'] = line[12:].strip()
+        elif '/strain=' in line:
+            metadata['Strain'] = legacy_value(line, 'strain')
+        elif '/country=' in line or '/geo_loc_name=' in line:
+            field = 'country' if '/country=' in line else 'geo_loc_name'
+            metadata['Country'] = legacy_value(line, field)
+        elif '/collection_date=' in line:
+            metadata['Collection_Date'] = legacy_value(line, 'collection_date')
+        elif '/collected_by=' in line:
+            metadata['Collected_By'] = legacy_value(line, 'collected_by')
+        elif '/isolation_source=' in line:
+            metadata['Isolation_Source'] = legacy_value(line, 'isolation_source')
+        elif '/product=' in line:
+            metadata['Product'] = legacy_value(line, 'product')
+        elif line.startswith('LOCUS'):
+            parts = line.split()
+            if len(parts) >= 3:
+                metadata['Length'] = parts[2] + 'bp'
+    return metadata
+
+
+def legacy_value(line, field_name):
+    for pattern in (f'/{field_name}="', f'/{field_name}='):
+        start = line.find(pattern)
+        if start != -1:
+            start += len(pattern)
+            end = line.find('"', start) if '"' in pattern else min(
+                line.find(' ', start), line.find('\n', start), line.find(';', start), len(line))
+            if end == -1:
+                end = len(line)
+            return line[start:end].strip()
+    return 'NA'
+
+
+def corpus_records(scaled_length):
+    """``(name, teks GenBank)`` untuk setiap record corpus, plus satu record ``scaled_length`` basa."""
+    records = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_FOLDER, '*.gb'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            records.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    name, gb_text = max(records, key=lambda record: len(record[1]))
+    head, _, rest = gb_text.partition('FEATURES             Location/Qualifiers\n')
+    table = rest.split('ORIGIN')[0]
+    source, _, features = table.partition('\n     gene')
+    length = int(head.split()[2])
+    copies = max(1, scaled_length // length)
+    scaled = (head.replace(f" {length} bp", f" {scaled_length} bp", 1)
+              + 'FEATURES             Location/Qualifiers\n' + source + '\n'
+              + ('     gene' + features) * copies
+              + 'ORIGIN      \n' + format_origin(make_sequence(scaled_length)) + '//\n')
+    records.append((f"{name}_x{copies}", scaled))
+    return records
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def peak_rss_mb():
+    # VmHWM milik proses ini saja; ru_maxrss di Linux ikut mewarisi puncak proses induk saat fork
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KiB di Linux, dalam byte di macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_scenario(name, eutils_url):
+    """Menjalankan satu skenario di proses ini dan mengembalikan hasilnya."""
+    scenario = SCENARIOS[name]
+    mode = scenario.get('mode', 'download_batch')
+    workdir = tempfile.mkdtemp(prefix='ncbi_bench_')
+
+    def log(message, tag=None):
+        if tag == "failure_tag" and message.startswith("FAILED"):
+            fetcher.failures += 1
+
+    fetcher = BenchFetcher(
+        rate=scenario.get('rate'),
+        output_folder=workdir,
+        report_type=scenario.get('format', 'fasta'),
+        batch_size=scenario.get('batch_size', 1),
+        workers=scenario.get('workers', 1),
+        use_cache=False,
+        cache_folder=os.path.join(workdir, 'cache'),
+        log=log,
+        eutils_url=eutils_url,
+        parse_processes=scenario.get('parse_processes', 0),
+        range_size=scenario.get('range_size', 0),
+    )
+    accessions = [f"BM{i:06d}.1" for i in range(scenario['records'])]
+    try:
+        start = time.perf_counter()
+        if mode == 'download_batch':
+            completed = len(fetcher.download_batch(accessions, resume=False))
+        elif mode == 'parser_compare':
+            completed = 0
+            comparison = {}
+            start = time.perf_counter()
+            for name, gb_text in corpus_records(scenario['scaled_length']):
+                legacy_times, parse_times = [], []
+                for _ in range(scenario['records']):
+                    call_start = time.perf_counter()
+                    legacy_metadata(gb_text)
+                    legacy_times.append(time.perf_counter() - call_start)
+                    call_start = time.perf_counter()
+                    fetcher.extract_metadata(name, gb_text)
+                    parse_times.append(time.perf_counter() - call_start)
+                    completed += 1
+                fetcher.latencies.extend(parse_times)
+                comparison[name] = {'lines': gb_text.count('\n'),
+                                    'legacy_ms': ms(percentile(legacy_times, 50)),
+                                    'parse_genbank_ms': ms(percentile(parse_times, 50))}
+        elif mode == 'process_url':
+            completed = 0
+            for accession in accessions:
+                try:
+                    fetcher.process_url(accession)
+                    completed += 1
+                except Exception:
+                    fetcher.failures += 1
+        else:
+            server = scenario['server']
+            gb_text = make_record(accessions[0], server['seq_length'], server['features'])
+            start = time.perf_counter()
+            completed = 0
+            for accession in accessions:
+                call_start = time.perf_counter()
+                metadata = fetcher.extract_metadata(accession, gb_text)
+                fetcher.latencies.append(time.perf_counter() - call_start)
+                completed += metadata['Version'] != 'NA'
+        elapsed = time.perf_counter() - start
+    finally:
+        if fetcher.metadata_store is not None:
+            fetcher.metadata_store.close()
+        if fetcher.catalog is not None:
+            fetcher.catalog.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = fetcher.latencies
+    result = {
+        'description': scenario['description'],
+        'mode': mode,
+        'records': scenario['records'],
+        'completed': completed,
+        'failed': fetcher.failures,
+        'seconds': round(elapsed, 3),
+        'records_per_s': round(completed / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(max(latencies) if latencies else None),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if mode == 'parser_compare':
+        result['records'] = completed
+        result['parsers'] = comparison
+    return result
+
+
+def ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def run_child(name, eutils_url):
+    """Menjalankan skenario di proses anak; hasil dibaca dari stdout sebagai JSON."""
+    command = [sys.executable, '-m', 'benchmarks.run', '--child', name, '--eutils-url', eutils_url]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(command, cwd=root, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+def git_revision():
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                              capture_output=True, text=True, timeout=10)
+        return proc.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get('scenarios', {})
+    print(f"\nCompared with {baseline_path}:", file=sys.stderr)
+    for name, result in results.items():
+        before = baseline.get(name, {}).get('records_per_s')
+        after = result.get('records_per_s')
+        if before and after:
+            print(f"  {name:<20} {before:>10.1f} -> {after:>10.1f} records/s ({after / before - 1:+.1%})",
+                  file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Offline benchmarks against a local mock E-utilities server.")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("-o", "--output", default=RESULTS_FILE, help="JSON results file (default: %(default)s)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare records/s against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--eutils-url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        json.dump(run_scenario(args.child, args.eutils_url), sys.stdout)
+        return 0
+
+    mock = MockEutils().start()
+    results = {}
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            scenario = SCENARIOS[name]
+            mock.configure(**scenario['server'])
+            mock.reset_counts()
+            print(f"Running {name}: {scenario['description']}...", file=sys.stderr)
+            result = run_child(name, mock.url)
+            result['requests'] = mock.counts
+            results[name] = result
+            latency = result['latency_ms']
+            print(f"  {result['completed']}/{result['records']} records in {result['seconds']}s "
+                  f"({result['records_per_s']} records/s), p50 {latency['p50']} ms, "
+                  f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, peak RSS {result['peak_rss_mb']} MB",
+                  file=sys.stderr)
+            for record, times in result.get('parsers', {}).items():
+                print(f"    {record:<24} {times['lines']:>7} lines: legacy loop {times['legacy_ms']} ms, "
+                      f"parse_genbank {times['parse_genbank_ms']} ms", file=sys.stderr)
+    finally:
+        mock.stop()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scenarios': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Root conftest: pytest menambahkan folder ini ke sys.path, jadi `pytest` biasa bisa mengimpor
+# ncbi_fetcher dan benchmarks tanpa instalasi (sama seperti `python -m pytest`)
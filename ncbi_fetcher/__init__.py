@@ -0,0 +1,29 @@
+"""NCBI Sequence Fetcher: download nuccore records and their metadata.
+
+The fetch/parse/save engine is importable without tkinter or pandas::
+
+    from ncbi_fetcher import SequenceFetcher
+
+    fetcher = SequenceFetcher(output_folder="out", report_type="fasta")
+    fetcher.process_url("JN188370.1")
+"""
+
+from .engine import METADATA_COLUMNS, SequenceFetcher
+from .inputs import InputReader
+from .journal import BatchJournal
+from .metrics import Metrics
+from .ratelimit import TokenBucket
+from .storage import Catalog, MetadataStore, RecordCache, ShardStore
+
+__all__ = [
+    'BatchJournal',
+    'Catalog',
+    'InputReader',
+    'METADATA_COLUMNS',
+    'MetadataStore',
+    'Metrics',
+    'RecordCache',
+    'SequenceFetcher',
+    'ShardStore',
+    'TokenBucket',
+]
@@ -0,0 +1,172 @@
+"""Command line entry point: ``python -m ncbi_fetcher``.
+
+Accessions come from arguments, ``--input`` files or stdin; ``--query``/``--epost``
+download through the History server and ``--list`` queries the catalog.
+"""
+
+import argparse
+import os
+import sys
+
+from .engine import CACHE_FOLDER, EUTILS_URL, SHARD_FOLDER, SequenceFetcher
+from .inputs import InputReader
+from .storage import CATALOG_FILENAME, Catalog, ShardStore
+
+LIST_COLUMNS = ('Accession', 'Version', 'Format', 'Organism', 'Country', 'Collection_Date', 'Path')
+
+
+def extract_records(output, keys):
+    folder = os.path.join(output, SHARD_FOLDER)
+    if not os.path.isdir(folder):
+        print(f"no shards in {output}", file=sys.stderr)
+        return 1
+    store = ShardStore(folder, 0)
+    missing = 0
+    try:
+        for key in keys:
+            text = store.read(key)
+            if text is None:
+                print(f"not found: {key}", file=sys.stderr)
+                missing += 1
+            else:
+                sys.stdout.write(text)
+    finally:
+        store.close()
+    return 0 if not missing else 1
+
+
+def list_records(output, args):
+    path = os.path.join(output, CATALOG_FILENAME)
+    if not os.path.exists(path):
+        print(f"no catalog in {output}; run with --rebuild-catalog first", file=sys.stderr)
+        return 1
+    catalog = Catalog(path)
+    try:
+        rows = catalog.query(organism=args.organism, country=args.country,
+                             date_from=args.since, date_to=args.until)
+    finally:
+        catalog.close()
+    print('\t'.join(LIST_COLUMNS))
+    for row in rows:
+        print('\t'.join(str(row.get(column, 'NA')) for column in LIST_COLUMNS))
+    print(f"{len(rows)} records", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="ncbi_fetcher",
+        description="Download nuccore records and metadata from NCBI without the GUI.")
+    parser.add_argument("accessions", nargs="*",
+                        help="accessions, regions (accession:start-stop[:-]) or NCBI URLs "
+                             "(default: read from stdin)")
+    parser.add_argument("-i", "--input", action="append", default=[], metavar="FILE",
+                        help="file (or .gz) with one accession or URL per line; '-' for stdin (repeatable)")
+    parser.add_argument("-q", "--query", metavar="TERM",
+                        help="Entrez search term, e.g. 'txid2697049[Organism] AND complete genome[Title]'")
+    parser.add_argument("--epost", action="store_true",
+                        help="upload the accession list with EPost and page through the History server")
+    parser.add_argument("-o", "--output", default=".", help="output folder (default: current folder)")
+    parser.add_argument("-f", "--format", choices=("fasta", "genbank"), default="fasta")
+    parser.add_argument("-t", "--template", default="{accession}_{organism}.{ext}",
+                        help="filename template (default: %(default)s)")
+    parser.add_argument("--shard-size-mb", type=int, default=0, metavar="MB",
+                        help="append records to gzip shards of at most MB in OUTPUT/shards "
+                             "instead of writing one file per record")
+    parser.add_argument("--extract", action="append", default=[], metavar="ID",
+                        help="print a record (ID from the filename template, or accession) "
+                             "from the shards in OUTPUT and exit (repeatable)")
+    parser.add_argument("--list", action="store_true",
+                        help="print catalog records of OUTPUT as TSV (with the filters below) and exit")
+    parser.add_argument("--organism", help="--list filter; case-insensitive, trailing * for a prefix")
+    parser.add_argument("--country", help="--list filter on the country part of /country; trailing * for a prefix")
+    parser.add_argument("--since", metavar="DATE", help="--list filter: collection date on or after DATE (e.g. 2020)")
+    parser.add_argument("--until", metavar="DATE", help="--list filter: collection date on or before DATE")
+    parser.add_argument("--rebuild-catalog", action="store_true",
+                        help="re-index the records in OUTPUT into its catalog and exit")
+    parser.add_argument("--batch-size", type=int, default=200, help="accessions per efetch request")
+    parser.add_argument("--workers", type=int, default=3, help="concurrent download workers")
+    parser.add_argument("--range-size", type=int, default=0, metavar="BASES",
+                        help="fetch records longer than BASES as parallel seq_start/seq_stop ranges, "
+                             "each retried on its own (costs one ESummary request per batch)")
+    parser.add_argument("--parse-processes", type=int, default=0, metavar="N",
+                        help="parse and convert records in N worker processes while the download "
+                             "threads keep fetching (default: parse in the download threads)")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="attempts per request for transient errors and 429s (default: %(default)s)")
+    parser.add_argument("--api-key", default=os.environ.get("NCBI_API_KEY", ""),
+                        help="NCBI API key (default: $NCBI_API_KEY)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or fill the record cache")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="check unversioned accessions with ESummary before using the cache")
+    parser.add_argument("--cache-dir", default=CACHE_FOLDER, help="record cache folder (default: %(default)s)")
+    parser.add_argument("--cache-size-mb", type=int, default=2048, help="record cache size cap")
+    parser.add_argument("--eutils-url", default=EUTILS_URL,
+                        help="E-utilities base URL, e.g. a mirror or the benchmark mock server")
+    parser.add_argument("--prometheus-file", metavar="FILE",
+                        help="also write metrics in Prometheus text format, e.g. for the node exporter")
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignore the journal of an interrupted run and the catalog; download everything again")
+    parser.add_argument("--excel", action="store_true",
+                        help="export ncbi_metadata.xlsx when done (needs pandas and openpyxl)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.extract:
+        return extract_records(args.output, args.extract)
+    if args.list:
+        return list_records(args.output, args)
+
+    paths = list(args.input)
+    if args.query is None and not args.accessions and not paths and not args.rebuild_catalog:
+        if sys.stdin.isatty():
+            parser.error("no accessions given")
+        paths = ['-']
+    if args.query is not None and (args.accessions or paths):
+        parser.error("--query cannot be combined with accessions")
+    inputs = InputReader(paths, lines=args.accessions)
+
+    os.makedirs(args.output, exist_ok=True)
+    fetcher = SequenceFetcher(
+        output_folder=args.output,
+        report_type=args.format,
+        filename_template=args.template,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        api_key=args.api_key,
+        use_cache=not args.no_cache,
+        revalidate_cache=args.revalidate,
+        cache_size_mb=args.cache_size_mb,
+        cache_folder=args.cache_dir,
+        eutils_url=args.eutils_url,
+        prometheus_file=args.prometheus_file,
+        max_retries=args.max_retries,
+        shard_size_mb=args.shard_size_mb,
+        parse_processes=args.parse_processes,
+        range_size=args.range_size,
+    )
+    if args.rebuild_catalog:
+        fetcher.log(f"Catalog: indexed {fetcher.rebuild_catalog()} records in {args.output}")
+        return 0
+    if args.query is not None:
+        completed, total = fetcher.download_query(term=args.query, resume=not args.fresh)
+    else:
+        if args.epost:
+            completed, _ = fetcher.download_query(accession_ids=list(inputs), resume=not args.fresh)
+        else:
+            completed = fetcher.download_batch(inputs, resume=not args.fresh)
+        if not inputs.read:
+            parser.error("no accessions given")
+        fetcher.log(inputs.summary(), tag="failure_tag" if inputs.invalid else None)
+        # Duplikat bukan kegagalan; input yang tidak valid dihitung gagal
+        total = inputs.unique + inputs.invalid
+    fetcher.log_cache_stats()
+    if args.excel:
+        fetcher.export_metadata()
+    fetcher.write_metrics()
+    fetcher.log(f"=== COMPLETED: {len(completed)}/{total} ===")
+    return 0 if len(completed) == total else 1
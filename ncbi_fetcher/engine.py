@@ -0,0 +1,1325 @@
+import io
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from datetime import datetime
+
+# requests (~100 ms) baru di-import di dalam method yang benar-benar perlu ke
+# jaringan, sehingga start-up CLI dan record dari cache tidak membayar biayanya
+from .genbank import parse_genbank
+from .inputs import GI_PATTERN, format_region, parse_accessions, split_region
+from .journal import JOURNAL_FILENAME, BatchJournal
+from .metrics import METRICS_FILENAME, Metrics
+from .ratelimit import RATE_LIMIT_API_KEY, RATE_LIMIT_DEFAULT, TokenBucket
+from .retry import (PERMANENT, THROTTLED, TRANSIENT, AdaptiveConcurrency, CircuitBreaker,
+                    backoff_delay, classify_error, http_status, retry_after_seconds)
+from .storage import CATALOG_FILENAME, Catalog, MetadataStore, RecordCache, ShardStore
+
+# Base E-utilities; bisa diganti ke mirror atau server mock benchmark
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+CACHE_FOLDER = os.path.join(os.path.expanduser("~"), ".ncbi_fetcher_cache")
+
+STREAM_CHUNK_SIZE = 64 * 1024
+FASTA_LINE_WIDTH = 70
+GENBANK_LINE_WIDTH = 60  # Basa per baris ORIGIN, dalam blok 10
+EPOST_MAX_IDS = 10000  # Batas ID per request EPost yang dianjurkan NCBI
+SHARD_FOLDER = "shards"
+PARSE_QUEUE_PER_PROCESS = 2  # Record mentah yang boleh menunggu parse, per proses
+
+METADATA_COLUMNS = [
+    'Accession', 'Version', 'Strain', 'Organism', 'Taxonomy',
+    'Country', 'Collection_Date', 'Collected_By', 'Isolation_Source',
+    'Product', 'Definition', 'Length', 'Filename', 'Downloaded'
+]
+
+
+class SequenceFetcher:
+    """Mesin fetch/parse/save tanpa GUI; dipakai aplikasi Tk dan CLI."""
+
+    def __init__(self, output_folder=".", report_type="fasta",
+                 filename_template="{accession}_{organism}.{ext}", batch_size=200,
+                 workers=3, api_key="", use_cache=True, revalidate_cache=False,
+                 cache_size_mb=2048, cache_folder=CACHE_FOLDER, metadata_file=None, log=None,
+                 eutils_url=EUTILS_URL, prometheus_file=None, max_retries=3, shard_size_mb=0,
+                 parse_processes=0, range_size=0):
+        self.output_folder = output_folder
+        self.report_type = report_type
+        self.filename_template = filename_template
+        self.batch_size = batch_size
+        self.workers = workers
+        self.api_key = api_key
+        self.use_cache = use_cache
+        self.revalidate_cache = revalidate_cache
+        self.cache_size_mb = cache_size_mb
+        self.cache_folder = cache_folder
+        self.metadata_file = metadata_file or os.path.join(output_folder, "ncbi_metadata.xlsx")
+        self.metadata_columns = METADATA_COLUMNS
+        self.log_callback = log
+        self.eutils_url = eutils_url
+        self.prometheus_file = prometheus_file
+        self.metrics = Metrics()
+        self.max_retries = max_retries
+        self.shard_size_mb = shard_size_mb  # 0 = satu file per record
+        self.shard_store = None
+        self.parse_processes = parse_processes  # 0 = parse di thread download
+        self.parse_pool = None
+        self.parse_slots = None
+        self.range_size = range_size  # Basa per request efetch bertahap; 0 = record utuh
+        self.rate_limiter = TokenBucket(RATE_LIMIT_DEFAULT)
+        self.record_cache = None
+        self.metadata_store = None
+        self.journal = None
+        self.catalog = None
+        self.resume = True  # Lewati record yang sudah ada di journal/katalog
+        self.reset_flow_control()
+
+    def log(self, message, tag=None):
+        if self.log_callback is not None:
+            self.log_callback(message, tag)
+        else:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] {message}", file=sys.stderr)
+
+    def init_metadata(self):
+        if self.metadata_store is not None:
+            self.metadata_store.close()
+        store_path = os.path.splitext(self.metadata_file)[0] + ".sqlite"
+        is_new = not os.path.exists(store_path)
+        self.metadata_store = MetadataStore(store_path, self.metadata_columns)
+        # Workbook lama dibaca sekali, saat store belum ada; import yang gagal dicoba lagi di run berikutnya
+        if (is_new or self.metadata_store.import_pending()) and os.path.exists(self.metadata_file):
+            try:
+                rows = self.metadata_store.import_excel(self.metadata_file)
+                self.log(f"Metadata: imported {rows} rows from {self.metadata_file}")
+            except Exception as e:
+                self.metadata_store.mark_import_pending()
+                self.log(f"Metadata import error ({self.metadata_file}): {str(e)} - "
+                         "the workbook will not be overwritten until it can be imported", tag="failure_tag")
+
+    def open_catalog(self, index_existing=True):
+        """Katalog di folder output; katalog baru diisi dari isi folder bila ``index_existing``."""
+        path = os.path.join(self.output_folder, CATALOG_FILENAME)
+        if self.catalog is not None and self.catalog.path == path:
+            return self.catalog
+        if self.catalog is not None:
+            self.catalog.close()
+        is_new = not os.path.exists(path)
+        self.catalog = Catalog(path)
+        if is_new and index_existing:
+            count = self.rebuild_catalog()
+            if count:
+                self.log(f"Catalog: indexed {count} existing records in {self.output_folder}")
+        return self.catalog
+
+    def rebuild_catalog(self):
+        """Membangun ulang katalog dari file dan shard di folder output; returns jumlah record."""
+        catalog = self.open_catalog(index_existing=False)
+        if self.metadata_store is None:
+            self.init_metadata()
+        return catalog.rebuild(self.scan_output_folder())
+
+    def scan_output_folder(self):
+        for entry in sorted(os.scandir(self.output_folder), key=lambda e: e.name):
+            ext = os.path.splitext(entry.name)[1][1:]
+            if ext not in ('fasta', 'genbank') or not entry.is_file():
+                continue
+            metadata = self.metadata_store.latest(entry.name)
+            if metadata is None:
+                try:
+                    metadata = self.read_file_metadata(entry.path, ext)
+                except (OSError, UnicodeDecodeError):
+                    continue
+            if metadata is not None and metadata.get('Accession'):
+                yield metadata, entry.name, ext
+        folder = os.path.join(self.output_folder, SHARD_FOLDER)
+        if os.path.exists(os.path.join(folder, "index.sqlite")):
+            shards = ShardStore(folder, 0)
+            try:
+                records = shards.records()
+            finally:
+                shards.close()
+            for record_id, version, shard in records:
+                metadata = self.metadata_store.latest(record_id)
+                if metadata is None:
+                    metadata = self.new_metadata(version)
+                    metadata['Version'] = version.split(':')[0]
+                    metadata['Filename'] = record_id
+                yield metadata, os.path.join(SHARD_FOLDER, shard), shard.split('.')[1]
+
+    def read_file_metadata(self, path, ext):
+        """Metadata dari file record sendiri: header GenBank, atau judul FASTA (accession dan definisi)."""
+        metadata = self.new_metadata(None)
+        metadata['Filename'] = os.path.basename(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            if ext == 'genbank':
+                record = parse_genbank((line.rstrip('\n') for line in f), keep_sequence=False, stop_at_origin=True)
+                self.fill_metadata(metadata, record)
+                metadata['Accession'] = None if metadata['Version'] == 'NA' else metadata['Version']
+                return metadata
+            title = f.readline().rstrip('\n')
+        if not title.startswith('>') or len(title) < 2:
+            return None
+        accession, _, definition = title[1:].partition(' ')
+        version, _, span = accession.partition(':')
+        metadata['Version'] = version
+        metadata['Accession'] = accession
+        if span:
+            # Judul efetch untuk strand minus: ACC:cstop-start
+            start, _, stop = span.lstrip('c').partition('-')
+            if span.startswith('c') and start.isdigit() and stop.isdigit():
+                metadata['Accession'] = format_region(version, int(stop), int(start), 2)
+        if definition:
+            metadata['Definition'] = definition
+        return metadata
+
+    def done_location(self, accession_id):
+        """Lokasi output yang sudah ada (journal, atau katalog saat resume), atau None.
+
+        Hit katalog hanya berlaku bila format, layout dan nama file sama dengan run ini.
+        """
+        if self.journal is not None and self.journal.is_done(accession_id):
+            return self.journal.done[accession_id]
+        if self.resume and self.catalog is not None:
+            sharded = self.shard_size_mb > 0
+            for location, metadata in self.catalog.locate(accession_id, self.report_type):
+                if location.startswith(SHARD_FOLDER + os.sep) != sharded:
+                    continue
+                try:
+                    filename = self.build_filename(metadata, self.report_type)
+                except Exception:
+                    continue
+                if filename == metadata.get('Filename') and \
+                        os.path.exists(os.path.join(self.output_folder, location)):
+                    return location
+        return None
+
+    def set_metadata_file(self, metadata_file):
+        if metadata_file != self.metadata_file:
+            self.metadata_file = metadata_file
+            if self.metadata_store is not None:
+                self.init_metadata()
+
+    def download_batch(self, urls, on_progress=None, resume=True, total=None):
+        """Memproses semua URL per chunk dengan worker pool; returns URL yang selesai.
+
+        ``urls`` dibaca bertahap; dengan ``resume`` accession di journal atau katalog dilewati.
+        """
+        completed_urls = []
+        if total is None and hasattr(urls, '__len__'):
+            total = len(urls)
+        counts = {'read': 0, 'skipped': 0}
+        chunk_size = max(1, self.batch_size)
+        self.start_run(resume)
+
+        def pending_chunks():
+            chunk = []
+            for url in urls:
+                counts['read'] += 1
+                try:
+                    accession_id = self.parse_accession(url)
+                except ValueError:
+                    accession_id = None
+                if accession_id is not None and self.done_location(accession_id) is not None:
+                    completed_urls.append(url)
+                    counts['skipped'] += 1
+                    continue
+                chunk.append(url)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        workers = max(1, self.workers)
+        self.log(f"Using {workers} workers at {self.rate_limiter.rate} requests/s")
+        exhausted = False
+        done = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunks = pending_chunks()
+                futures = {}
+                while True:
+                    # Antrian dibatasi: input dibaca hanya secepat chunk selesai
+                    while not exhausted and len(futures) < workers * 2:
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            exhausted = True
+                            total = counts['read']
+                            if counts['skipped']:
+                                self.log(f"Skipped {counts['skipped']} already downloaded")
+                        else:
+                            futures[executor.submit(self.timed, self.process_chunk_with_retry, chunk)] = chunk
+                    if not futures:
+                        break
+                    # Progress hanya diperbarui dari thread ini
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        chunk = futures.pop(future)
+                        try:
+                            results, duration = future.result()
+                        except Exception as e:
+                            results, duration = {url: e for url in chunk}, None
+                        for url in chunk:
+                            result = results[url]
+                            if isinstance(result, Exception):
+                                self.log(f"FAILED: {url} - {str(result)}", tag="failure_tag")
+                            else:
+                                completed_urls.append(url)
+                                self.log(f"COMPLETED in {duration:.2f}s: {result}", tag="success_tag")
+                        done += len(chunk)
+                    if on_progress is not None:
+                        current = done + counts['skipped']
+                        on_progress(current, max(total or 0, current), completed_urls)
+        finally:
+            self.finish_run(exhausted and len(completed_urls) == counts['read'])
+        return completed_urls
+
+    def download_query(self, term=None, accession_ids=None, on_progress=None, resume=True):
+        """Mengunduh hasil ESearch (``term``) atau daftar ID lewat EPost per halaman History server.
+
+        Returns ``(completed, total)``.
+        """
+        completed = []
+        total = None
+        self.start_run(resume)
+        try:
+            if term is not None:
+                webenv, query_key, total = self.call_with_retry(self.esearch, (term,), 'esearch', "ESearch")
+                self.log(f"ESearch: {total} records match {term!r}")
+                history = [(webenv, query_key, total)]
+                regions = []
+            else:
+                accession_ids = list(dict.fromkeys(accession_ids))
+                total = len(accession_ids)
+                pending = []
+                regions = []
+                for accession_id in accession_ids:
+                    if self.done_location(accession_id) is not None:
+                        completed.append(accession_id)
+                    elif split_region(accession_id)[1] is not None:
+                        # EPost hanya menerima ID; region diunduh per chunk seperti di download_batch
+                        regions.append(accession_id)
+                    else:
+                        pending.append(accession_id)
+                if completed:
+                    self.log(f"Skipped {len(completed)} already downloaded, "
+                             f"{len(pending) + len(regions)} remaining")
+                history = []
+                webenv = None
+                for i in range(0, len(pending), EPOST_MAX_IDS):
+                    ids = pending[i:i + EPOST_MAX_IDS]
+                    webenv, query_key = self.call_with_retry(self.epost, (ids, webenv), 'epost', "EPost")
+                    history.append((webenv, query_key, len(ids)))
+                if history:
+                    self.log(f"EPost: {len(pending)} IDs uploaded in {len(history)} request(s)")
+
+            page_size = max(1, self.batch_size)
+            pages = [(webenv, query_key, retstart, min(page_size, count - retstart))
+                     for webenv, query_key, count in history
+                     for retstart in range(0, count, page_size)]
+            chunks = [regions[i:i + page_size] for i in range(0, len(regions), page_size)]
+            workers = max(1, self.workers)
+            self.log(f"Using {workers} workers at {self.rate_limiter.rate} requests/s")
+            done = len(completed)
+            if on_progress is not None:
+                on_progress(done, total, completed)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(self.timed, self.process_page_with_retry, *page): page for page in pages}
+                futures.update({executor.submit(self.timed, self.process_chunk_with_retry, chunk): chunk
+                                for chunk in chunks})
+                for future in as_completed(futures):
+                    if isinstance(futures[future], list):
+                        chunk = futures[future]
+                        results, duration = future.result()
+                        results = list(results.items())
+                        retmax = len(chunk)
+                    else:
+                        webenv, query_key, retstart, retmax = futures[future]
+                        try:
+                            results, duration = future.result()
+                        except Exception as e:
+                            self.log(f"FAILED: records {retstart + 1}-{retstart + retmax} of query "
+                                     f"{query_key} - {str(e)}", tag="failure_tag")
+                            results = []
+                    for version, result in results:
+                        if isinstance(result, Exception):
+                            self.log(f"FAILED: {version} - {str(result)}", tag="failure_tag")
+                        else:
+                            completed.append(version)
+                            self.log(f"COMPLETED in {duration:.2f}s: {result}", tag="success_tag")
+                    done += retmax
+                    if on_progress is not None:
+                        on_progress(min(done, total), total, completed)
+        finally:
+            self.finish_run(total is not None and len(completed) >= total)
+        return completed, total
+
+    def timed(self, func, *args):
+        # Durasi per chunk/halaman; dulu log memakai waktu sejak awal batch (kumulatif)
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+    def start_run(self, resume):
+        """Menyiapkan metadata store, rate limit, cache, journal dan metrik untuk satu run."""
+        self.metrics = Metrics()
+        self.resume = resume
+        if self.metadata_store is None:
+            self.init_metadata()
+        self.open_catalog()
+        self.configure_rate_limit()
+        self.reset_flow_control()
+        self.get_record_cache()
+        self.start_parse_pool()
+        journal_path = os.path.join(self.output_folder, JOURNAL_FILENAME)
+        if not resume and os.path.exists(journal_path):
+            os.remove(journal_path)
+        self.journal = BatchJournal(journal_path)
+
+    def finish_run(self, complete):
+        # Journal hanya dihapus bila semua record selesai, supaya run berikutnya bisa resume
+        if complete:
+            self.journal.clear()
+        else:
+            self.journal.close()
+        self.journal = None
+        if self.shard_store is not None:
+            self.shard_store.close()
+            self.shard_store = None
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+            self.parse_pool = None
+
+    def write_metrics(self):
+        """Menulis metrik run ke ``batch_metrics.json`` (dan file Prometheus); panggil setelah export."""
+        try:
+            path = os.path.join(self.output_folder, METRICS_FILENAME)
+            self.metrics.write_json(path)
+            if self.prometheus_file:
+                self.metrics.write_prometheus(self.prometheus_file)
+        except Exception as e:
+            self.log(f"Metrics export error: {str(e)}", tag="failure_tag")
+            return
+        stages = self.metrics.summary()['stages']
+        if stages:
+            self.log("Stages: " + " | ".join(
+                f"{stage} {s['count']}x p50 {s['p50_ms']}ms p95 {s['p95_ms']}ms"
+                for stage, s in stages.items()))
+        self.log(f"Metrics written to: {path}")
+
+    def log_cache_stats(self):
+        if self.record_cache is not None and self.use_cache:
+            stats = self.record_cache.stats()
+            self.log(f"Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                     f"{stats['evictions']} evicted, {stats['entries']} records "
+                     f"({stats['bytes'] / 1024 / 1024:.1f} MB)")
+
+    def process_chunk_with_retry(self, urls, max_retries=None, results=None):
+        """``process_chunk`` dengan retry; returns hasil per URL.
+
+        Record yang sudah tersimpan tidak diunduh ulang; 4xx dibelah dua sampai hanya ID yang salah gagal.
+        """
+        results = {} if results is None else results
+        try:
+            self.call_with_retry(self.process_chunk, (urls, results), 'chunk',
+                                 f"chunk of {len(urls)} URLs", max_retries)
+        except Exception as e:
+            pending = [url for url in urls if url not in results]
+            if len(pending) > 1 and classify_error(e) == PERMANENT and http_status(e) is not None:
+                self.metrics.inc('chunk_splits_total')
+                half = len(pending) // 2
+                self.process_chunk_with_retry(pending[:half], max_retries, results)
+                self.process_chunk_with_retry(pending[half:], max_retries, results)
+            else:
+                for url in pending:
+                    results[url] = e
+        return {url: results[url] for url in urls}
+
+    def process_page_with_retry(self, webenv, query_key, retstart, retmax, max_retries=None):
+        return self.call_with_retry(self.process_page, (webenv, query_key, retstart, retmax), 'page',
+                                    f"records {retstart + 1}-{retstart + retmax}", max_retries)
+
+    def call_with_retry(self, func, args, unit, label, max_retries=None, limit=True):
+        """Menjalankan ``func(*args)`` dengan retry adaptif (backoff, AIMD, circuit breaker).
+
+        Error permanen langsung di-raise; panggilan bersarang memakai ``limit=False``.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            self.breaker.wait()
+            if limit:
+                self.concurrency.acquire()
+            try:
+                result = func(*args)
+            except Exception as e:
+                kind = classify_error(e)
+                retry_after = retry_after_seconds(e) if kind == THROTTLED else None
+                if limit:
+                    self.concurrency.release(kind, retry_after)
+                if kind != TRANSIENT:
+                    # Server menjawab (meski dengan error): bukan tanda gangguan jaringan
+                    self.breaker.record_success()
+                if kind == PERMANENT:
+                    raise
+                if kind == THROTTLED:
+                    self.metrics.inc('throttled_total', unit=unit)
+                if kind == TRANSIENT and self.breaker.record_failure():
+                    # Breaker terbuka: breaker.wait() yang menjeda, percobaan ini tidak dihitung
+                    self.metrics.inc('retries_total', unit=unit, reason='outage')
+                    continue
+                attempt += 1
+                if attempt >= max_retries:
+                    raise
+                wait_time = backoff_delay(attempt - 1, retry_after=retry_after)
+                self.metrics.inc('retries_total', unit=unit, reason=kind)
+                self.log(f"Retry {attempt} for {label} in {wait_time:.1f}s ({kind}: {str(e)})",
+                         tag="failure_tag")
+                time.sleep(wait_time)
+            else:
+                if limit:
+                    self.concurrency.release()
+                self.breaker.record_success()
+                return result
+
+    def reset_flow_control(self):
+        self.concurrency = AdaptiveConcurrency(max(1, self.workers))
+        self.breaker = CircuitBreaker(on_open=self.on_circuit_open)
+
+    def on_circuit_open(self, seconds):
+        self.metrics.inc('circuit_open_total')
+        self.log(f"NCBI unreachable: pausing batch for {seconds:.0f}s", tag="failure_tag")
+
+    def process_page(self, webenv, query_key, retstart, retmax):
+        """Mengunduh satu halaman History server; returns ``(accession.version, filename/exception)``."""
+        results = []
+        ext = self.report_type
+        cache = self.get_record_cache()
+        params = self.with_api_key({
+            'db': 'nuccore',
+            'WebEnv': webenv,
+            'query_key': query_key,
+            'retstart': retstart,
+            'retmax': retmax,
+            'rettype': 'gb',
+            'retmode': 'text'
+        })
+        with self.post_stream('efetch', params) as lines:
+            for record in self.iter_records(lines, ext, cache):
+                tmp_path, metadata, has_sequence = record
+                version = metadata['Version']
+                location = self.done_location(version)
+                if location is not None:
+                    os.remove(tmp_path)
+                    results.append((version, location))
+                    continue
+                try:
+                    results.append((version, self.save_record(tmp_path, metadata, ext, has_sequence)))
+                except Exception as e:
+                    results.append((version, e))
+        return results
+
+    def process_chunk(self, urls, results=None):
+        """Mengunduh beberapa accession dalam satu request efetch; returns filename/exception per URL.
+
+        URL di ``results`` atau journal dilewati; region dan record besar lewat ``fetch_ranged``.
+        """
+        results = {} if results is None else results
+        wanted = {}
+        for url in urls:
+            if url in results:
+                continue
+            try:
+                accession_id = self.parse_accession(url)
+            except Exception as e:
+                results[url] = e
+                continue
+            location = self.done_location(accession_id)
+            if location is not None:
+                results[url] = location
+            else:
+                wanted.setdefault(accession_id, []).append(url)
+        if not wanted:
+            return results
+
+        ext = self.report_type
+        cache = self.get_record_cache()
+        if cache is not None:
+            revalidate = self.revalidate_cache
+            # Region tidak disimpan di cache: cache berisi record utuh per versi
+            records = [a for a in wanted if split_region(a)[1] is None]
+            versions = self.resolve_versions(records) if revalidate else {}
+            for accession_id in records:
+                key = accession_id
+                if revalidate and '.' not in accession_id:
+                    # Tanpa versi terkini dari ESummary, record diambil ulang dari NCBI
+                    key = versions.get(accession_id)
+                    if key is None:
+                        continue
+                path = cache.get(key)
+                if path is None:
+                    continue
+                with self.metrics.timer('cache_read'), open(path, 'r', encoding='utf-8') as f:
+                    record = self.stream_record((line.rstrip('\n') for line in f), ext, accession_id)
+                if record is not None:
+                    self.metrics.inc('records_total', source='cache')
+                    self.finish_record(record, wanted, ext, results)
+
+        # Response efetch untuk GI berisi ACC.V, jadi GI dipetakan dulu lewat ESummary
+        aliases = self.resolve_gis(list(wanted))
+        if wanted:
+            for accession_id, span in self.plan_ranges(list(wanted)).items():
+                try:
+                    record = self.fetch_ranged(accession_id, *span, ext)
+                except Exception as e:
+                    for url in wanted.pop(accession_id):
+                        results[url] = e
+                    continue
+                self.finish_record(record, wanted, ext, results, accession_id)
+
+        if wanted:
+            with self.open_stream(list(wanted), 'gb') as lines:
+                for record in self.iter_records(lines, ext, cache):
+                    self.finish_record(record, wanted, ext, results, aliases=aliases)
+
+        for accession_id, chunk_urls in wanted.items():
+            for url in chunk_urls:
+                results[url] = ValueError(f"Record {accession_id} not returned by NCBI")
+        return results
+
+    def start_parse_pool(self):
+        # Dibuat per run (satu thread), supaya worker download tidak berebut membuatnya
+        if self.parse_processes <= 0 or self.parse_pool is not None:
+            return
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Proses baru dibuat saat submit pertama, di thread download: fork di sana bisa mewarisi lock
+        # (SQLite, metrik, Tk) yang sedang dipegang thread lain, jadi dipakai forkserver/spawn
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes,
+                                              mp_context=multiprocessing.get_context(method))
+        self.parse_slots = threading.BoundedSemaphore(self.parse_processes * PARSE_QUEUE_PER_PROCESS)
+
+    def iter_records(self, lines, ext, cache=None):
+        """Record dari satu response efetch, berurutan, sebagai ``(tmp_path, metadata, has_sequence)``.
+
+        Dengan ``parse_processes`` parse berjalan di process pool sementara thread ini terus mengunduh.
+        """
+        if self.parse_pool is None:
+            while True:
+                record = self.next_record(lines, ext, cache)
+                if record is None:
+                    return
+                yield record
+        folder = cache.folder if cache is not None else self.output_folder
+        pending = deque()
+        try:
+            while True:
+                start = time.perf_counter()
+                raw_path = self.download_raw_record(lines, folder)
+                if raw_path is None:
+                    break
+                self.metrics.observe('download', time.perf_counter() - start)
+                self.parse_slots.acquire()
+                future = self.parse_pool.submit(parse_raw_record, raw_path, self.output_folder, ext)
+                future.add_done_callback(lambda _: self.parse_slots.release())
+                pending.append((future, raw_path))
+                while pending and pending[0][0].done():
+                    yield self.collect_parsed(*pending.popleft(), cache)
+            while pending:
+                yield self.collect_parsed(*pending.popleft(), cache)
+        finally:
+            # Stream gagal atau consumer berhenti: buang sisa file sementara
+            for future, raw_path in pending:
+                future.cancel()
+                future.add_done_callback(lambda f, raw_path=raw_path: discard_parsed(f, raw_path))
+
+    def download_raw_record(self, lines, folder):
+        """Menyalin satu record GenBank mentah (sampai ``//``) ke file sementara; None di akhir stream."""
+        first = next((line for line in lines if line.strip()), None)
+        if first is None:
+            return None
+        fd, raw_path = tempfile.mkstemp(dir=folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as raw:
+                raw.write(first + '\n')
+                complete = first.startswith('//')
+                for line in ([] if complete else lines):
+                    raw.write(line + '\n')
+                    if line.startswith('//'):
+                        complete = True
+                        break
+            if not complete:
+                raise ConnectionError(f"Stream ended inside a record before '//' ({first[:40].strip()})")
+        except Exception:
+            os.remove(raw_path)
+            raise
+        return raw_path
+
+    def collect_parsed(self, future, raw_path, cache=None):
+        try:
+            tmp_path, metadata, has_sequence, seconds = future.result()
+        except Exception:
+            os.remove(raw_path)
+            raise
+        self.metrics.observe('parse', seconds)
+        self.metrics.inc('records_total', source='network')
+        if cache is not None and metadata['Version'] != 'NA':
+            cache.put(metadata['Version'], raw_path)
+        else:
+            os.remove(raw_path)
+        return tmp_path, metadata, has_sequence
+
+    def next_record(self, lines, ext, cache=None):
+        # Tahap "stream": unduh + parse + tulis file sementara, tak terpisahkan saat streaming
+        start = time.perf_counter()
+        record = self.stream_record(lines, ext, cache=cache)
+        if record is not None:
+            self.metrics.observe('stream', time.perf_counter() - start)
+            self.metrics.inc('records_total', source='network')
+        return record
+
+    def finish_record(self, record, wanted, ext, results, accession_id=None, aliases=None):
+        tmp_path, metadata, has_sequence = record
+        if accession_id is None:
+            accession_id = self.match_accession(wanted, metadata['Version'], aliases)
+        if accession_id is None:
+            os.remove(tmp_path)
+            return
+        chunk_urls = wanted.pop(accession_id)
+        metadata['Accession'] = accession_id
+        try:
+            filename = self.save_record(tmp_path, metadata, ext, has_sequence)
+            for url in chunk_urls:
+                results[url] = filename
+        except Exception as e:
+            for url in chunk_urls:
+                results[url] = e
+
+    def save_record(self, tmp_path, metadata, ext, has_sequence):
+        """Menyimpan record hasil stream: file output, metadata dan journal."""
+        try:
+            with self.metrics.timer('write'):
+                shards = self.get_shard_store()
+                if shards is None:
+                    filename = location = self.save_data(tmp_path, metadata, ext, has_sequence)
+                else:
+                    filename, location = self.save_to_shard(shards, tmp_path, metadata, ext, has_sequence)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.metrics.inc('saved_total', status='failed')
+            raise
+        self.save_metadata(metadata, filename)
+        self.add_to_catalog(metadata, location, ext)
+        self.metrics.inc('saved_total', status='ok')
+        if self.journal is not None:
+            self.journal.record(metadata['Accession'], location)
+        return filename
+
+    def plan_ranges(self, accession_ids):
+        """Accession yang diunduh per rentang: ``{accession_id: (accession, start, stop, strand)}``."""
+        plan = {}
+        records = []
+        for accession_id in accession_ids:
+            accession, start, stop, strand = split_region(accession_id)
+            if start is None:
+                records.append(accession_id)
+            else:
+                plan[accession_id] = (accession, start, stop, strand)
+        if self.range_size > 0 and records:
+            for accession_id, length in self.sequence_lengths(records).items():
+                if length > self.range_size:
+                    plan[accession_id] = (accession_id, 1, length, 1)
+        return plan
+
+    def fetch_ranged(self, accession_id, accession, start, stop, strand, ext):
+        """Mengunduh satu region atau record besar per rentang ``range_size`` basa secara paralel."""
+        region = (start, stop, strand) if accession_id != accession else None
+        span = {'seq_start': start, 'seq_stop': stop, 'strand': strand}
+        size = self.range_size if self.range_size > 0 else stop - start + 1
+        if stop - start + 1 <= size:
+            return self.call_with_retry(self.fetch_span, (accession, span, ext, accession_id, region),
+                                        'range', accession_id, limit=False)
+        header_path, metadata, record = self.call_with_retry(
+            self.fetch_header, (accession, span), 'range', f"annotation of {accession_id}", limit=False)
+        metadata['Accession'] = accession_id
+        if not record.has_origin:
+            # Tanpa sekuens (mis. CON): file header sudah berisi record lengkap
+            return header_path, metadata, ext == 'genbank'
+        if record.length:
+            # Region yang melewati ujung record dipotong NCBI
+            stop = min(stop, start + record.length - 1)
+        ranges = [(first, min(first + size - 1, stop)) for first in range(start, stop + 1, size)]
+        if strand == 2:
+            ranges.reverse()
+        self.log(f"Fetching {accession_id} in {len(ranges)} ranges of up to {size} bases")
+        futures = []
+        tmp_path = None
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+                futures = [executor.submit(self.call_with_retry, self.fetch_range, (accession, first, last, strand),
+                                           'range', f"{accession}:{first}-{last}", None, False)
+                           for first, last in ranges]
+                try:
+                    parts = [future.result() for future in futures]
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            fd, tmp_path = tempfile.mkstemp(dir=self.output_folder, suffix='.part')
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                if ext == 'genbank':
+                    with open(header_path, 'r', encoding='utf-8') as header:
+                        shutil.copyfileobj(header, out)
+                else:
+                    out.write(self.fasta_header(record, region))
+                self.write_sequence(parts, out, ext)
+        except Exception:
+            if tmp_path is not None:
+                os.remove(tmp_path)
+            raise
+        finally:
+            os.remove(header_path)
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    os.remove(future.result())
+        return tmp_path, metadata, True
+
+    def fetch_span(self, accession, span, ext, accession_id, region=None):
+        # Satu request efetch untuk region kecil; hasilnya sama seperti stream_record
+        params = self.efetch_params([accession], 'gb')
+        params.update(span)
+        with self.post_stream('efetch', params) as lines:
+            record = self.stream_record(lines, ext, accession_id, region=region)
+        if record is None:
+            raise ValueError(f"Record {accession_id} not returned by NCBI")
+        self.metrics.inc('records_total', source='network')
+        return record
+
+    def fetch_header(self, accession, span):
+        """Anotasi GenBank sampai baris ORIGIN ke file sementara; returns ``(path, metadata, record)``."""
+        params = self.efetch_params([accession], 'gb')
+        params.update(span)
+        fd, header_path = tempfile.mkstemp(dir=self.output_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out, self.post_stream('efetch', params) as lines:
+                first = next((line for line in lines if line.strip()), None)
+                if first is None:
+                    raise ValueError(f"Record {accession} not returned by NCBI")
+                record = parse_genbank(self.tee_lines(itertools.chain([first], lines), out),
+                                       keep_sequence=False, stop_at_origin=True)
+                if not (record.has_origin or record.complete):
+                    raise ConnectionError(f"Annotation of {accession} ended before '//'")
+        except Exception:
+            os.remove(header_path)
+            raise
+        metadata = self.new_metadata(None)
+        self.fill_metadata(metadata, record)
+        self.metrics.inc('records_total', source='network')
+        return header_path, metadata, record
+
+    def fetch_range(self, accession, start, stop, strand):
+        """Sekuens satu rentang (FASTA efetch) ke file sementara, tanpa header dan baris baru."""
+        params = self.efetch_params([accession], 'fasta')
+        params.update({'seq_start': start, 'seq_stop': stop, 'strand': strand})
+        fd, part_path = tempfile.mkstemp(dir=self.output_folder, suffix='.part')
+        size = 0
+        try:
+            with self.metrics.timer('range'), os.fdopen(fd, 'w', encoding='utf-8') as out, \
+                    self.post_stream('efetch', params) as lines:
+                for line in lines:
+                    if not line.startswith('>'):
+                        line = line.strip()
+                        out.write(line)
+                        size += len(line)
+            if size != stop - start + 1:
+                # Body terpotong: diperlakukan sebagai gangguan jaringan, rentang ini saja yang diulang
+                raise ConnectionError(f"Range {start}-{stop} of {accession} incomplete "
+                                      f"({size} of {stop - start + 1} bases)")
+        except Exception:
+            os.remove(part_path)
+            raise
+        return part_path
+
+    def write_sequence(self, parts, out, ext, line_width=FASTA_LINE_WIDTH):
+        """Menulis sekuens dari file-file rentang, berurutan, sebagai FASTA atau ORIGIN GenBank."""
+        as_fasta = ext != 'genbank'
+        width = line_width if as_fasta else GENBANK_LINE_WIDTH
+        position = 1
+        carry = ''
+        for path in parts:
+            with open(path, 'r', encoding='utf-8') as f:
+                for block in iter(lambda: f.read(STREAM_CHUNK_SIZE), ''):
+                    data = carry + block
+                    end = len(data) - len(data) % width
+                    for i in range(0, end, width):
+                        position = self.write_sequence_line(out, data[i:i + width], as_fasta, position)
+                    carry = data[end:]
+        if carry:
+            self.write_sequence_line(out, carry, as_fasta, position)
+        out.write('\n' if as_fasta else '//\n')
+
+    def write_sequence_line(self, out, row, as_fasta, position):
+        if as_fasta:
+            out.write(row.upper() + '\n')
+        else:
+            blocks = ' '.join(row[i:i + 10] for i in range(0, len(row), 10))
+            out.write(f"{position:>9} {blocks.lower()}\n")
+        return position + len(row)
+
+    def match_accession(self, wanted, version, aliases=None):
+        if version in wanted:
+            return version
+        base = version.split('.')[0]
+        if base in wanted:
+            return base
+        if aliases and aliases.get(version) in wanted:
+            return aliases[version]
+        return None
+
+    def configure_rate_limit(self):
+        rate = RATE_LIMIT_API_KEY if (self.api_key or '').strip() else RATE_LIMIT_DEFAULT
+        if self.rate_limiter.rate != rate:
+            self.rate_limiter = TokenBucket(rate)
+
+    def endpoint(self, name):
+        return f"{self.eutils_url.rstrip('/')}/{name}.fcgi"
+
+    def with_api_key(self, params):
+        api_key = (self.api_key or '').strip()
+        if api_key:
+            params['api_key'] = api_key
+        return params
+
+    def efetch_params(self, accession_ids, rettype):
+        return self.with_api_key({
+            'db': 'nuccore',
+            'id': ','.join(accession_ids),
+            'rettype': rettype,
+            'retmode': 'text'
+        })
+
+    def fetch_records(self, accession_ids, rettype, timeout=60):
+        # POST supaya daftar ID yang panjang tidak terpotong di URL
+        return self.post('efetch', self.efetch_params(accession_ids, rettype), timeout).text
+
+    def post(self, name, params, timeout=60, stream=False):
+        """POST ke endpoint E-utilities ``name`` lewat rate limiter, dengan metrik per request."""
+        import requests
+        waited = self.rate_limiter.acquire()
+        self.metrics.inc('rate_limit_wait_seconds_total', waited)
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        if name == 'efetch':
+            headers['Accept'] = 'text/plain'
+        status = 'error'
+        try:
+            with self.metrics.timer('request'):
+                response = requests.post(self.endpoint(name), data=params, headers=headers,
+                                         timeout=timeout, stream=stream)
+            status = response.status_code
+            if response.status_code >= 400:
+                response.close()
+            response.raise_for_status()
+        finally:
+            self.metrics.inc('requests_total', endpoint=name, status=status)
+        if not stream:
+            self.metrics.inc('bytes_total', len(response.content), endpoint=name)
+        return response
+
+    def open_stream(self, accession_ids, rettype, timeout=60):
+        """Seperti fetch_records, tetapi baris response dibaca per chunk."""
+        return self.post_stream('efetch', self.efetch_params(accession_ids, rettype), timeout)
+
+    @contextmanager
+    def post_stream(self, name, params, timeout=60):
+        response = self.post(name, params, timeout, stream=True)
+        try:
+            response.encoding = response.encoding or 'utf-8'
+            yield response.iter_lines(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True)
+        finally:
+            # Byte yang benar-benar dibaca dari socket (sebelum dekompresi)
+            tell = getattr(response.raw, 'tell', None)
+            if tell is not None:
+                self.metrics.inc('bytes_total', tell(), endpoint=name)
+            response.close()
+
+    def esearch(self, term, db='nuccore'):
+        """ESearch dengan ``usehistory=y``; returns ``(webenv, query_key, count)``."""
+        params = self.with_api_key({'db': db, 'term': term, 'usehistory': 'y', 'retmax': 0, 'retmode': 'json'})
+        response = self.post('esearch', params, timeout=30)
+        result = response.json().get('esearchresult', {})
+        if result.get('ERROR'):
+            raise ValueError(f"ESearch error: {result['ERROR']}")
+        if not result.get('webenv'):
+            raise ValueError("ESearch returned no History server handle")
+        return result['webenv'], result['querykey'], int(result.get('count', 0))
+
+    def epost(self, accession_ids, webenv=None, db='nuccore'):
+        """Mengunggah daftar ID ke History server; returns ``(webenv, query_key)``."""
+        from xml.etree import ElementTree
+        params = self.with_api_key({'db': db, 'id': ','.join(accession_ids)})
+        if webenv:
+            params['WebEnv'] = webenv
+        response = self.post('epost', params, timeout=60)
+        root = ElementTree.fromstring(response.content)
+        error = root.findtext('ERROR')
+        if error:
+            raise ValueError(f"EPost error: {error}")
+        invalid = [node.text for node in root.iter('Id') if node.text]
+        if invalid:
+            self.log(f"EPost: {len(invalid)} invalid IDs ignored (e.g. {invalid[0]})", tag="failure_tag")
+        return root.findtext('WebEnv'), root.findtext('QueryKey')
+
+    def parse_accession(self, url):
+        # Parse accession ID dari semua jenis URL; efetch URL dengan banyak ID memakai yang pertama
+        return parse_accessions(url)[0]
+
+    def process_url(self, url):
+        # Cukup satu download GenBank: metadata dan FASTA diturunkan dari stream yang sama
+        self.configure_rate_limit()
+        result = self.process_chunk([url])[url]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_record_cache(self):
+        if not self.use_cache:
+            return None
+        if self.record_cache is None:
+            self.record_cache = RecordCache(self.cache_folder, 0)
+        self.record_cache.max_bytes = max(0, self.cache_size_mb) * 1024 * 1024
+        return self.record_cache
+
+    def get_shard_store(self):
+        if self.shard_size_mb <= 0:
+            return None
+        folder = os.path.join(self.output_folder, SHARD_FOLDER)
+        if self.shard_store is None or self.shard_store.folder != folder:
+            if self.shard_store is not None:
+                self.shard_store.close()
+            self.shard_store = ShardStore(folder, 0)
+        self.shard_store.max_bytes = self.shard_size_mb * 1024 * 1024
+        return self.shard_store
+
+    def resolve_versions(self, accession_ids):
+        """Cari accession.version terkini untuk accession tanpa versi lewat ESummary."""
+        unversioned = [a for a in accession_ids if '.' not in a]
+        if not unversioned:
+            return {}
+        try:
+            summaries = self.esummary(unversioned)
+        except Exception as e:
+            self.log(f"Version lookup warning: {str(e)}")
+            return {}
+        versions = {}
+        for summary in summaries:
+            if summary.get('caption') and summary.get('accessionversion'):
+                versions[summary['caption']] = summary['accessionversion']
+        return versions
+
+    def resolve_gis(self, accession_ids):
+        """``{accession.version: GI}`` untuk input GI lewat ESummary (``uid`` → ``accessionversion``)."""
+        gis = [a for a in accession_ids if GI_PATTERN.match(a)]
+        if not gis:
+            return {}
+        try:
+            summaries = self.esummary(gis)
+        except Exception as e:
+            self.log(f"GI lookup warning: {str(e)}")
+            return {}
+        return {summary['accessionversion']: summary['uid'] for summary in summaries
+                if summary.get('uid') in gis and summary.get('accessionversion')}
+
+    def sequence_lengths(self, accession_ids):
+        """Panjang sekuens (``slen`` ESummary) per accession; kosong bila lookup gagal."""
+        try:
+            summaries = self.esummary(accession_ids)
+        except Exception as e:
+            self.log(f"Length lookup warning: {str(e)}")
+            return {}
+        wanted = set(accession_ids)
+        lengths = {}
+        for summary in summaries:
+            length = summary.get('slen')
+            for key in (summary.get('accessionversion'), summary.get('caption'), summary.get('uid')):
+                if key in wanted and length:
+                    lengths[key] = int(length)
+        return lengths
+
+    def esummary(self, accession_ids, db='nuccore'):
+        params = self.with_api_key({'db': db, 'id': ','.join(accession_ids), 'retmode': 'json'})
+        result = self.post('esummary', params, timeout=30).json().get('result', {})
+        return [result.get(uid, {}) for uid in result.get('uids', [])]
+
+    def stream_record(self, lines, ext, accession_id=None, cache=None, region=None):
+        """Menulis satu record GenBank dari stream ke file sementara.
+
+        Returns ``(tmp_path, metadata, has_sequence)``, atau None bila stream habis.
+        """
+        first = next((line for line in lines if line.strip()), None)
+        if first is None:
+            return None
+        metadata = self.new_metadata(accession_id)
+        record_lines = itertools.chain([first], lines)
+        raw = None
+        if cache is not None:
+            raw_fd, raw_path = tempfile.mkstemp(dir=cache.folder, suffix='.part')
+            raw = os.fdopen(raw_fd, 'w', encoding='utf-8')
+            record_lines = self.tee_lines(record_lines, raw)
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                has_sequence = self.write_record(record_lines, out, ext, metadata, region=region)
+        except Exception:
+            os.remove(tmp_path)
+            if raw is not None:
+                raw.close()
+                os.remove(raw_path)
+            raise
+        if raw is not None:
+            raw.close()
+            if metadata['Version'] != 'NA':
+                cache.put(metadata['Version'], raw_path)
+            else:
+                os.remove(raw_path)
+        if accession_id is None:
+            metadata['Accession'] = metadata['Version']
+        return tmp_path, metadata, has_sequence
+
+    def tee_lines(self, lines, out):
+        for line in lines:
+            out.write(line + '\n')
+            yield line
+
+    def write_record(self, lines, out, ext, metadata, line_width=FASTA_LINE_WIDTH, region=None):
+        """Menulis satu record GenBank ke ``out`` sebagai GenBank atau FASTA (layout efetch).
+
+        Returns False bila FASTA diminta tetapi record tanpa ORIGIN.
+        """
+        as_fasta = ext != 'genbank'
+        lines = iter(lines)
+        header_lines = lines if as_fasta else self.tee_lines(lines, out)
+        record = parse_genbank(header_lines, keep_sequence=False, stop_at_origin=True)
+        self.fill_metadata(metadata, record)
+        if not record.has_origin:
+            if not record.complete:
+                raise ConnectionError(f"Record {record.version or record.accession} ended before '//'")
+            return not as_fasta
+
+        if as_fasta:
+            out.write(self.fasta_header(record, region))
+        has_sequence = not as_fasta
+        carry = ''
+        bases = 0
+        for line in lines:
+            if not as_fasta:
+                out.write(line + '\n')
+            if line.startswith('//'):
+                record.complete = True
+                break
+            row = ''.join(line.split()[1:])
+            bases += len(row)
+            if as_fasta:
+                carry += row.upper()
+                while len(carry) >= line_width:
+                    out.write(carry[:line_width] + '\n')
+                    carry = carry[line_width:]
+                    has_sequence = True
+        # Stream yang ditutup di tengah record: diperlakukan sebagai gangguan jaringan, chunk diulang
+        check_complete(record, bases)
+        if as_fasta:
+            if carry:
+                out.write(carry + '\n')
+                has_sequence = True
+            out.write('\n')
+        return has_sequence
+
+    def fasta_header(self, record, region=None):
+        # Region diberi nama seperti efetch: ACC:start-stop, atau ACC:cstop-start untuk strand minus
+        title = record.definition
+        if title.endswith('.'):
+            title = title[:-1]
+        accession = record.version or record.accession
+        if region is not None:
+            start, stop, strand = region
+            if record.length:
+                stop = min(stop, start + record.length - 1)
+            accession += f":c{stop}-{start}" if strand == 2 else f":{start}-{stop}"
+        return f">{accession} {title}\n" if title else f">{accession}\n"
+
+    def gb_to_fasta(self, gb_text):
+        """Membuat FASTA dari teks GenBank; None bila tidak ada ORIGIN."""
+        out = io.StringIO()
+        if not self.write_record(iter(gb_text.split('\n')), out, 'fasta', self.new_metadata(None)):
+            return None
+        return out.getvalue()
+
+    def new_metadata(self, accession_id):
+        return {
+            'Accession': accession_id,
+            'Version': 'NA',
+            'Strain': 'NA',
+            'Organism': 'NA',
+            'Taxonomy': 'NA',
+            'Country': 'NA',
+            'Collection_Date': 'NA',
+            'Collected_By': 'NA',
+            'Isolation_Source': 'NA',
+            'Product': 'NA',
+            'Definition': 'NA',
+            'Length': 'NA',
+            'Downloaded': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def extract_metadata(self, accession_id, gb_text=None):
+        metadata = self.new_metadata(accession_id)
+        try:
+            if gb_text is None:
+                gb_text = self.fetch_records([accession_id], 'gb', timeout=10)
+            self.fill_metadata(metadata, parse_genbank(gb_text, keep_sequence=False))
+        except Exception as e:
+            self.log(f"Metadata warning: {str(e)}")
+        return metadata
+
+    def fill_metadata(self, metadata, record):
+        """Mengisi kolom metadata dari GenBankRecord hasil parser."""
+        if record.version or record.accession:
+            metadata['Version'] = record.version or record.accession
+        if record.definition:
+            metadata['Definition'] = record.definition
+        if record.organism:
+            metadata['Organism'] = record.organism
+        if record.taxonomy:
+            metadata['Taxonomy'] = record.taxonomy.rstrip('.')
+        if record.length is not None:
+            metadata['Length'] = f"{record.length}bp"
+        metadata['Strain'] = self.extract_value(record, 'strain')
+        metadata['Country'] = self.extract_value(record, 'country')
+        if metadata['Country'] == 'NA':
+            metadata['Country'] = self.extract_value(record, 'geo_loc_name')
+        metadata['Collection_Date'] = self.extract_value(record, 'collection_date')
+        metadata['Collected_By'] = self.extract_value(record, 'collected_by')
+        metadata['Isolation_Source'] = self.extract_value(record, 'isolation_source')
+        metadata['Product'] = self.extract_value(record, 'product', feature_key=None)
+
+    def extract_value(self, record, field_name, feature_key='source'):
+        """Nilai lengkap (termasuk baris lanjutan) dari qualifier pertama yang cocok."""
+        value = record.qualifier(field_name, key=feature_key)
+        return 'NA' if value is None else value
+
+    def build_filename(self, metadata, ext):
+        filename = self.filename_template.format(
+            accession=metadata.get('Accession', 'unknown'),
+            organism=metadata.get('Organism', 'unknown').replace(' ', '_'),
+            strain=metadata.get('Strain', 'unknown'),
+            product=metadata.get('Product', 'unknown'),
+            length=metadata.get('Length', 'unknown'),
+            date=datetime.now().strftime('%Y%m%d'),
+            ext=ext
+        ).replace('/', '_').replace('\\', '_')
+        return "".join(c if c.isalnum() or c in ('_', '-', '.') else '_' for c in filename)
+
+    def save_data(self, tmp_path, metadata, ext, has_sequence=True):
+        """Memindahkan file sementara ke nama akhirnya secara atomik."""
+        if not has_sequence:
+            self.fetch_fasta(tmp_path, metadata)
+        filename = self.record_filename(metadata, ext)
+        os.replace(tmp_path, os.path.join(self.output_folder, filename))
+        return filename
+
+    def save_to_shard(self, shards, tmp_path, metadata, ext, has_sequence=True):
+        """Menambahkan record ke shard gzip; returns ``(record_id, path shard)``."""
+        if not has_sequence:
+            self.fetch_fasta(tmp_path, metadata)
+        record_id = self.record_filename(metadata, ext)
+        version = metadata['Version'] if metadata['Version'] != 'NA' else metadata['Accession']
+        if split_region(metadata['Accession'])[1] is not None:
+            version = metadata['Accession']
+        shard = shards.add(record_id, version, tmp_path, ext)
+        os.remove(tmp_path)
+        return record_id, os.path.join(SHARD_FOLDER, shard)
+
+    def fetch_fasta(self, tmp_path, metadata):
+        # Record tanpa ORIGIN (mis. CON/WGS master): minta FASTA langsung ke NCBI
+        accession, start, stop, strand = split_region(metadata['Accession'])
+        params = self.efetch_params([accession], 'fasta')
+        if start is not None:
+            params.update({'seq_start': start, 'seq_stop': stop, 'strand': strand})
+        with self.post_stream('efetch', params) as lines, \
+                open(tmp_path, 'w', encoding='utf-8') as out:
+            for line in lines:
+                out.write(line + '\n')
+
+    def record_filename(self, metadata, ext):
+        try:
+            return self.build_filename(metadata, ext)
+        except Exception as e:
+            raise ValueError(f"Filename generation failed: {str(e)}")
+
+    def save_metadata(self, metadata, filename):
+        try:
+            metadata['Filename'] = filename
+            if self.metadata_store is None:
+                self.init_metadata()
+            with self.metrics.timer('metadata'):
+                self.metadata_store.append(metadata)
+        except Exception as e:
+            self.log(f"Metadata error: {str(e)}")
+
+    def add_to_catalog(self, metadata, location, ext):
+        try:
+            catalog = self.catalog if self.catalog is not None else self.open_catalog()
+            with self.metrics.timer('catalog'):
+                catalog.add(metadata, location, ext)
+        except Exception as e:
+            self.log(f"Catalog error: {str(e)}")
+
+    def export_metadata(self):
+        try:
+            if self.metadata_store is None:
+                self.init_metadata()
+            if self.metadata_store.import_pending() and os.path.exists(self.metadata_file):
+                self.log(f"Metadata not exported: {self.metadata_file} has not been imported yet; "
+                         "fix or move it and run again", tag="failure_tag")
+                return
+            with self.metrics.timer('excel'):
+                rows = self.metadata_store.export_excel(self.metadata_file)
+            self.log(f"Metadata exported ({rows} rows) to: {self.metadata_file}")
+        except Exception as e:
+            self.log(f"Metadata export error: {str(e)}", tag="failure_tag")
+
+
+def check_complete(record, bases):
+    """ConnectionError bila ``//`` belum terbaca atau jumlah basa ORIGIN tidak sama dengan LOCUS."""
+    name = record.version or record.accession
+    if not record.complete:
+        raise ConnectionError(f"Record {name} ended before '//' ({bases} bases read)")
+    if record.length is not None and bases != record.length:
+        raise ConnectionError(f"Record {name} incomplete ({bases} of {record.length} bases)")
+
+
+def parse_raw_record(raw_path, output_folder, ext):
+    """Tahap parse di process pool; returns ``(tmp_path, metadata, has_sequence, seconds)``."""
+    start = time.perf_counter()
+    fetcher = SequenceFetcher(output_folder=output_folder, report_type=ext)
+    with open(raw_path, 'r', encoding='utf-8') as f:
+        tmp_path, metadata, has_sequence = fetcher.stream_record((line.rstrip('\n') for line in f), ext)
+    return tmp_path, metadata, has_sequence, time.perf_counter() - start
+
+
+def discard_parsed(future, raw_path):
+    if os.path.exists(raw_path):
+        os.remove(raw_path)
+    if not future.cancelled() and future.exception() is None:
+        tmp_path = future.result()[0]
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
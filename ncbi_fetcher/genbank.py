@@ -0,0 +1,238 @@
+"""Single-pass GenBank flat file parser.
+
+Header and feature table are parsed straight off a line iterator; qualifiers
+are only parsed when a feature is first read.
+"""
+
+# Qualifier yang baris lanjutannya disambung tanpa spasi
+UNSPACED_QUALIFIERS = ('translation',)
+
+
+class Feature:
+    """Satu entri feature table: key, lokasi dan qualifier (di-parse saat pertama dibaca)."""
+
+    __slots__ = ('key', 'raw', '_location', '_qualifiers')
+
+    def __init__(self, key, location):
+        self.key = key
+        self.raw = []
+        self._location = location
+        self._qualifiers = None
+
+    @property
+    def location(self):
+        if self._qualifiers is None:
+            self.parse()
+        return self._location
+
+    @property
+    def qualifiers(self):
+        if self._qualifiers is None:
+            self.parse()
+        return self._qualifiers
+
+    def parse(self):
+        location = self._location.strip()
+        qualifiers = []
+        last_unquoted = False
+        # Qualifier ber-kutip yang berlanjut ke baris berikutnya
+        open_name = None
+        open_parts = None
+        open_quotes = 0
+        for line in self.raw:
+            text = line.strip()
+            if not text:
+                continue
+            if open_name is not None:
+                open_parts.append(text)
+                open_quotes += text.count('"')
+                if not open_quotes % 2:
+                    joiner = '' if open_name in UNSPACED_QUALIFIERS else ' '
+                    qualifiers.append((open_name, unquote(joiner.join(open_parts))))
+                    open_name = None
+            elif text[0] == '/':
+                name, has_value, value = text[1:].partition('=')
+                last_unquoted = False
+                if not has_value:
+                    qualifiers.append((name, ''))
+                elif value[:1] == '"':
+                    quotes = value.count('"')
+                    if quotes % 2:
+                        open_name, open_parts, open_quotes = name, [value], quotes
+                    else:
+                        qualifiers.append((name, unquote(value)))
+                else:
+                    qualifiers.append((name, value))
+                    last_unquoted = True
+            elif not qualifiers:
+                # Lokasi panjang, mis. join(...), bisa berlanjut ke baris berikutnya
+                location += text
+            elif last_unquoted:
+                name, value = qualifiers[-1]
+                qualifiers[-1] = (name, value + text)
+        if open_name is not None:
+            # Kutip tidak pernah ditutup: simpan apa adanya
+            qualifiers.append((open_name, ' '.join(open_parts)))
+        self._location = location
+        self._qualifiers = qualifiers
+
+    def get(self, name, default=None):
+        for qualifier, value in self.qualifiers:
+            if qualifier == name:
+                return value
+        return default
+
+    def get_all(self, name):
+        return [value for qualifier, value in self.qualifiers if qualifier == name]
+
+    def __repr__(self):
+        return f"Feature({self.key!r}, {self.location!r}, {len(self.qualifiers)} qualifiers)"
+
+
+class GenBankRecord:
+    """Header, feature table dan (opsional) sekuens satu record GenBank."""
+
+    def __init__(self):
+        self.locus = None
+        self.length = None
+        self.molecule = None
+        self.topology = None
+        self.division = None
+        self.date = None
+        self.definition = ''
+        self.accession = None
+        self.version = None
+        self.keywords = ''
+        self.source = ''
+        self.organism = None
+        self.taxonomy = ''
+        self.features = []
+        self.has_origin = False
+        self.complete = False
+        self.sequence = None
+
+    def feature(self, key):
+        for feature in self.features:
+            if feature.key == key:
+                return feature
+        return None
+
+    def qualifier(self, name, key=None):
+        """Nilai pertama dari qualifier ``name``, opsional hanya di feature ``key``."""
+        for feature in self.features:
+            if key is None or feature.key == key:
+                value = feature.get(name)
+                if value is not None:
+                    return value
+        return None
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('""', '"')
+    return value
+
+
+def parse_locus(record, value):
+    parts = value.split()
+    if parts:
+        record.locus = parts[0]
+    if len(parts) >= 2 and parts[1].isdigit():
+        record.length = int(parts[1])
+    if len(parts) >= 4:
+        record.molecule = parts[3]
+    for part in parts[4:]:
+        if part in ('linear', 'circular'):
+            record.topology = part
+    if len(parts) >= 2:
+        record.date = parts[-1]
+        if len(parts) >= 7:
+            record.division = parts[-2]
+
+
+def parse_genbank(lines, keep_sequence=True, stop_at_origin=False):
+    """Parse satu record GenBank dalam satu lintasan, berhenti setelah ``//``.
+
+    Dengan ``stop_at_origin`` berhenti setelah baris ORIGIN; sekuens hanya disimpan dengan ``keep_sequence``.
+    """
+    if isinstance(lines, str):
+        lines = lines.split('\n')
+    lines = iter(lines)
+    record = GenBankRecord()
+    features = record.features
+    definition = []
+    source = []
+    taxonomy = []
+    keyword = None
+    in_features = False
+    raw = []
+
+    for line in lines:
+        if in_features and line[:1] == ' ':
+            if line[5:6] != ' ':
+                feature = Feature(line[5:21].strip(), line[21:])
+                features.append(feature)
+                raw = feature.raw
+            else:
+                raw.append(line)
+            continue
+
+        if line[:1] > ' ':
+            if line.startswith('//'):
+                record.complete = True
+                break
+            in_features = False
+            keyword = line[:12].strip()
+            value = line[12:].strip()
+            if keyword == 'LOCUS':
+                parse_locus(record, value)
+            elif keyword == 'DEFINITION':
+                definition.append(value)
+            elif keyword == 'ACCESSION':
+                if value:
+                    record.accession = value.split()[0]
+            elif keyword == 'VERSION':
+                if value:
+                    record.version = value.split()[0]
+            elif keyword == 'KEYWORDS':
+                record.keywords = value
+            elif keyword == 'SOURCE':
+                source.append(value)
+            elif keyword == 'FEATURES':
+                in_features = True
+            elif keyword == 'ORIGIN':
+                record.has_origin = True
+                if stop_at_origin:
+                    break
+                sequence = []
+                for line in lines:
+                    if line.startswith('//'):
+                        record.complete = True
+                        break
+                    if keep_sequence:
+                        sequence.append(''.join(line.split()[1:]))
+                if keep_sequence:
+                    record.sequence = ''.join(sequence).upper()
+                break
+        elif not line.strip():
+            continue
+        elif line[2:3] != ' ':
+            # Sub-keyword, mis. "  ORGANISM" atau "  AUTHORS"
+            keyword = line[:12].strip()
+            if keyword == 'ORGANISM':
+                record.organism = line[12:].strip()
+        else:
+            value = line[12:].strip()
+            if keyword == 'DEFINITION':
+                definition.append(value)
+            elif keyword == 'SOURCE':
+                source.append(value)
+            elif keyword == 'ORGANISM':
+                taxonomy.append(value)
+            elif keyword == 'KEYWORDS':
+                record.keywords += ' ' + value
+
+    record.definition = ' '.join(definition)
+    record.source = ' '.join(source)
+    record.taxonomy = ' '.join(taxonomy)
+    return record
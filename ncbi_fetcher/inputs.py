@@ -0,0 +1,170 @@
+"""Streaming input stage: accession lists from files, .gz files or stdin.
+
+Every accepted URL form is normalized to one canonical accession (regions as
+``accession:start-stop``, ``:-`` for the minus strand) and duplicates are dropped.
+"""
+
+import gzip
+import re
+import sys
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Accession polos (tanpa URL), mis. JN188370, NC_045512.2 atau NZ_CP012345.1; GI berupa angka saja
+ACCESSION_PATTERN = re.compile(r'^(?:[A-Za-z]{2}_[A-Za-z]*|[A-Za-z]+)[0-9]+(\.[0-9]+)?$')
+GI_PATTERN = re.compile(r'^[0-9]+$')
+# Region: accession:start-stop dengan strand opsional (:+ / :- atau :1 / :2)
+REGION_PATTERN = re.compile(r'^(.+?):([0-9]+)-([0-9]+)(?::([+-]|[12]))?$')
+QUERY_ID_KEYS = ('id', 'val')
+QUERY_REGION_KEYS = (('seq_start', 'seq_stop'), ('from', 'to'))
+INVALID_SAMPLES = 10
+
+
+def parse_accessions(value):
+    """Semua accession kanonik di dalam satu input (URL atau accession); ValueError bila tidak ada."""
+    value = value.strip().strip('"\'')
+    if not value:
+        raise ValueError("Empty input")
+    region = None
+    if '://' in value or value.startswith('www.'):
+        parts = urlsplit(value if '://' in value else 'https://' + value)
+        candidates = []
+        params = parse_qs(parts.query)
+        for key in QUERY_ID_KEYS:
+            for ids in params.get(key, []):
+                candidates.extend(ids.split(','))
+        for start_key, stop_key in QUERY_REGION_KEYS:
+            if start_key in params and stop_key in params:
+                strand = params.get('strand', ['1'])[0]
+                region = f":{params[start_key][0]}-{params[stop_key][0]}" + (":-" if strand == '2' else '')
+                break
+        path = unquote(parts.path).rstrip('/')
+        if not candidates and '/nuccore/' in path:
+            candidates = [path.split('/nuccore/', 1)[1].split('/')[0]]
+        elif not candidates and 'ncbi.nlm.nih.gov' in parts.netloc:
+            candidates = [path.rsplit('/', 1)[-1]]
+        if not candidates:
+            raise ValueError("Invalid NCBI URL format")
+    else:
+        candidates = value.split(',') if ',' in value else [value]
+
+    accessions = []
+    for candidate in candidates:
+        candidate = candidate.strip()
+        if region is not None and candidate:
+            candidate += region
+        match = REGION_PATTERN.match(candidate)
+        if match:
+            accession, start, stop, strand = match.groups()
+            start, stop = int(start), int(stop)
+            if not (ACCESSION_PATTERN.match(accession) or GI_PATTERN.match(accession)):
+                raise ValueError(f"Could not extract accession ID from {candidate!r}")
+            if not 1 <= start <= stop:
+                raise ValueError(f"Invalid region {candidate!r}: need 1 <= start <= stop")
+            accessions.append(format_region(accession.upper(), start, stop, 2 if strand in ('-', '2') else 1))
+        elif ACCESSION_PATTERN.match(candidate) or GI_PATTERN.match(candidate):
+            accessions.append(candidate.upper())
+        elif candidate:
+            raise ValueError(f"Could not extract accession ID from {candidate!r}")
+    if not accessions:
+        raise ValueError("Could not extract accession ID")
+    return accessions
+
+
+def format_region(accession, start, stop, strand=1):
+    """Bentuk kanonik sebuah region; ``strand`` 1 (plus) atau 2 (minus) seperti efetch."""
+    return f"{accession}:{start}-{stop}" + (":-" if strand == 2 else '')
+
+
+def split_region(accession_id):
+    """``(accession, start, stop, strand)``; start/stop/strand None bila bukan region."""
+    match = REGION_PATTERN.match(accession_id)
+    if match is None:
+        return accession_id, None, None, None
+    accession, start, stop, strand = match.groups()
+    return accession, int(start), int(stop), 2 if strand in ('-', '2') else 1
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def count_lines(paths):
+    """Jumlah baris kasar (perkiraan total untuk progress), tanpa parsing."""
+    total = 0
+    for path in paths:
+        if path == '-':
+            continue
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                total += block.count(b'\n')
+    return total
+
+
+def preview_lines(path, limit):
+    """``limit`` baris pertama sebuah file dan apakah masih ada baris lain."""
+    lines = []
+    with open_input(path) as f:
+        for line in f:
+            if len(lines) == limit:
+                return lines, True
+            lines.append(line.rstrip('\n'))
+    return lines, False
+
+
+class InputReader:
+    """Accession kanonik tanpa duplikat dari file (``'-'`` = stdin, ``.gz``) dan baris; iterasi sekali."""
+
+    def __init__(self, sources=(), lines=None):
+        self.sources = list(sources)
+        self.lines = lines
+        self.read = 0
+        self.unique = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.invalid_samples = []
+        self.seen = set()
+
+    def __iter__(self):
+        for line in self.iter_lines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            self.read += 1
+            try:
+                accessions = parse_accessions(line)
+            except ValueError:
+                self.invalid += 1
+                if len(self.invalid_samples) < INVALID_SAMPLES:
+                    self.invalid_samples.append(line)
+                continue
+            for accession in accessions:
+                # String kanonik utuh: tidak ada tabrakan hash yang diam-diam membuang accession
+                if accession in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(accession)
+                self.unique += 1
+                yield accession
+
+    def iter_lines(self):
+        for path in self.sources:
+            f = open_input(path)
+            try:
+                yield from f
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+        if self.lines is not None:
+            yield from self.lines
+
+    def summary(self):
+        text = (f"Inputs: {self.read} read, {self.unique} unique, "
+                f"{self.duplicates} duplicates, {self.invalid} invalid")
+        if self.invalid_samples:
+            text += f" (e.g. {self.invalid_samples[0]!r})"
+        return text
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+JOURNAL_FILENAME = "batch_journal.log"
+
+
+class BatchJournal:
+    """Log append-only accession yang selesai, untuk melanjutkan batch."""
+
+    def __init__(self, path, fsync_every=100, fsync_interval=1.0):
+        self.path = path
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.done = {}
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.replay()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def replay(self):
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                # Baris terakhir yang terpotong (proses mati saat menulis) dibuang
+                if not raw.endswith(b'\n'):
+                    break
+                valid_bytes += len(raw)
+                accession, _, filename = raw.decode('utf-8').rstrip('\n').partition('\t')
+                if accession:
+                    self.done[accession] = filename
+        if valid_bytes != os.path.getsize(self.path):
+            os.truncate(self.path, valid_bytes)
+
+    def is_done(self, accession):
+        """True bila accession sudah selesai dan file output-nya masih ada."""
+        filename = self.done.get(accession)
+        return bool(filename) and os.path.exists(os.path.join(self.folder, filename))
+
+    def record(self, accession, filename):
+        with self.lock:
+            self.file.write(f"{accession}\t{filename}\n")
+            self.file.flush()
+            self.done[accession] = filename
+            self.unsynced += 1
+            now = time.monotonic()
+            if self.unsynced >= self.fsync_every or now - self.last_sync >= self.fsync_interval:
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+                self.last_sync = now
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
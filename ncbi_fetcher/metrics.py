@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_FILENAME = "batch_metrics.json"
+METRICS_PREFIX = "ncbi_fetcher"
+
+# Batas atas bucket histogram latency (detik), gaya Prometheus
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+class Histogram:
+    """Histogram dengan bucket tetap: memori konstan berapa pun jumlah sampel."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Perkiraan kuantil, diinterpolasi linear di dalam bucket (seperti histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                if bound == math.inf:
+                    return self.max
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+
+class Metrics:
+    """Counter dan histogram latency per tahap untuk satu run, thread-safe."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.stages = {}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def counter(self, name, **labels):
+        """Jumlah counter ``name``, opsional hanya untuk label tertentu."""
+        wanted = {k: str(v) for k, v in labels.items()}
+        with self.lock:
+            return sum(value for (key, key_labels), value in self.counters.items()
+                       if key == name and wanted.items() <= dict(key_labels).items())
+
+    def summary(self):
+        with self.lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                label_text = ','.join(f"{k}={v}" for k, v in labels)
+                counters[f"{name}{{{label_text}}}" if label_text else name] = round(value, 6)
+            stages = {}
+            for stage, histogram in sorted(self.stages.items()):
+                stages[stage] = {
+                    'count': histogram.count,
+                    'total_s': round(histogram.sum, 3),
+                    'mean_ms': round(histogram.sum / histogram.count * 1000, 2),
+                    'p50_ms': as_ms(histogram.quantile(0.50)),
+                    'p95_ms': as_ms(histogram.quantile(0.95)),
+                    'p99_ms': as_ms(histogram.quantile(0.99)),
+                    'max_ms': as_ms(histogram.max),
+                }
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'duration_s': round(time.time() - self.started, 3),
+            'counters': counters,
+            'stages': stages,
+        }
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.summary(), indent=2) + '\n')
+
+    def write_prometheus(self, path, prefix=METRICS_PREFIX):
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{format_labels(labels)} {value}")
+            metric = f"{prefix}_stage_seconds"
+            if self.stages:
+                lines.append(f"# TYPE {metric} histogram")
+            for stage, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f"{metric}_bucket{format_labels((('stage', stage), ('le', le)))} {cumulative}")
+                lines.append(f"{metric}_sum{format_labels((('stage', stage),))} {histogram.sum}")
+                lines.append(f"{metric}_count{format_labels((('stage', stage),))} {histogram.count}")
+        write_atomic(path, '\n'.join(lines) + '\n')
+
+
+def as_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{escape_label(v)}"' for k, v in labels) + '}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_atomic(path, text):
+    # Collector tidak boleh membaca file yang setengah ditulis
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,28 @@
+import threading
+import time
+
+# Batas request NCBI E-utilities per detik
+RATE_LIMIT_DEFAULT = 3
+RATE_LIMIT_API_KEY = 10
+
+
+class TokenBucket:
+    """Token bucket thread-safe untuk semua worker: paling banyak ``rate`` request per detik."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
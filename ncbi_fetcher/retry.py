@@ -0,0 +1,173 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Jenis kegagalan, menentukan apakah dan bagaimana sebuah request diulang
+PERMANENT = 'permanent'
+TRANSIENT = 'transient'
+THROTTLED = 'throttled'
+
+TRANSIENT_STATUS = (408, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """NCBI tidak bisa dihubungi terlalu lama; sisa batch dihentikan."""
+
+
+def http_status(exc):
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def network_errors():
+    """Exception jaringan yang layak diulang; error konfigurasi requests (URL, schema) tidak termasuk."""
+    import requests
+    from urllib3.exceptions import ProtocolError
+    return (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout,
+            requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError, ProtocolError)
+
+
+def classify_error(exc):
+    """Menggolongkan exception sebagai PERMANENT, TRANSIENT atau THROTTLED.
+
+    429 berarti throttling; 408, 5xx dan error koneksi transient; 4xx lain dan sisanya permanent.
+    """
+    status = http_status(exc)
+    if status is not None:
+        if status == 429:
+            return THROTTLED
+        if status in TRANSIENT_STATUS or status >= 500:
+            return TRANSIENT
+        return PERMANENT
+    if isinstance(exc, CircuitOpenError):
+        return PERMANENT
+    if isinstance(exc, network_errors()):
+        return TRANSIENT
+    return PERMANENT
+
+
+def retry_after_seconds(exc):
+    """Nilai header Retry-After (detik atau tanggal HTTP), atau None."""
+    response = getattr(exc, 'response', None)
+    value = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    """Backoff eksponensial dengan jitter, tidak pernah lebih pendek dari ``retry_after``."""
+    ceiling = min(cap, base * 2 ** attempt)
+    delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+
+class AdaptiveConcurrency:
+    """Batas AIMD jumlah request yang berjalan; 429 membagi dua batas, sukses menaikkannya perlahan."""
+
+    def __init__(self, maximum, minimum=1, decrease=0.5, cooldown=1.0):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                elif self.in_flight < int(self.limit):
+                    break
+                else:
+                    self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, outcome=None, retry_after=None):
+        """Mengembalikan slot; ``outcome`` None berarti request berhasil."""
+        with self.cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == THROTTLED:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.last_decrease = now
+                if retry_after:
+                    self.resume_at = max(self.resume_at, now + retry_after)
+            elif outcome is None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+
+class CircuitBreaker:
+    """Menghentikan semua worker sementara setelah ``threshold`` kegagalan transient berturut-turut."""
+
+    def __init__(self, threshold=5, cooldown=30.0, max_cooldown=300.0, max_open=1800.0, on_open=None):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_open = max_open
+        self.on_open = on_open
+        self.failures = 0
+        self.open_until = None
+        self.opened_at = None
+        self.probing = False
+        self.cond = threading.Condition()
+
+    def wait(self):
+        with self.cond:
+            while self.open_until is not None:
+                now = time.monotonic()
+                if now - self.opened_at > self.max_open:
+                    raise CircuitOpenError(f"NCBI unreachable for more than {self.max_open:.0f}s")
+                if not self.probing and now >= self.open_until:
+                    self.probing = True
+                    return
+                self.cond.wait(max(0.05, self.open_until - now) if not self.probing else 1.0)
+
+    def record_success(self):
+        with self.cond:
+            self.failures = 0
+            if self.open_until is not None:
+                self.open_until = None
+                self.opened_at = None
+                self.probing = False
+                self.cooldown = self.base_cooldown
+                self.cond.notify_all()
+
+    def record_failure(self):
+        """Mencatat kegagalan transient; True bila breaker (sekarang) terbuka."""
+        with self.cond:
+            self.failures += 1
+            now = time.monotonic()
+            if self.probing:
+                self.probing = False
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif self.open_until is not None:
+                return True
+            elif self.failures < self.threshold:
+                return False
+            else:
+                self.opened_at = now
+            self.open_until = now + self.cooldown
+            cooldown = self.cooldown
+            self.cond.notify_all()
+        if self.on_open is not None:
+            self.on_open(cooldown)
+        return True
@@ -0,0 +1,392 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+# pandas/openpyxl hanya di-import saat workbook Excel dibaca atau ditulis
+
+CATALOG_FILENAME = "catalog.sqlite"
+MONTHS = {name: f"{i:02d}" for i, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+
+class MetadataStore:
+    """Store SQLite append-only untuk baris metadata; workbook diekspor dari sini."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        column_defs = ', '.join(f'"{c}" TEXT' for c in columns)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS metadata ({column_defs})")
+        if 'Filename' in columns:
+            self.conn.execute('CREATE INDEX IF NOT EXISTS metadata_filename ON metadata ("Filename")')
+        self.conn.commit()
+
+    def append(self, metadata):
+        values = [None if metadata.get(c) is None else str(metadata.get(c)) for c in self.columns]
+        placeholders = ', '.join('?' for _ in self.columns)
+        with self.lock:
+            self.conn.execute(f"INSERT INTO metadata VALUES ({placeholders})", values)
+            self.conn.commit()
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+    def latest(self, filename):
+        """Baris metadata terakhir untuk ``filename`` sebagai dict, atau None."""
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM metadata WHERE "Filename" = ? ORDER BY rowid DESC LIMIT 1',
+                                    (filename,)).fetchone()
+        return None if row is None else dict(zip(self.columns, row))
+
+    def import_excel(self, excel_path):
+        """Migrasi satu kali dari ncbi_metadata.xlsx lama ke store; menghapus tanda import tertunda."""
+        import pandas as pd
+        df = pd.read_excel(excel_path, dtype=str)
+        rows = [[None if pd.isna(row.get(c)) else row.get(c) for c in self.columns]
+                for row in df.to_dict('records')]
+        placeholders = ', '.join('?' for _ in self.columns)
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(f"INSERT INTO metadata VALUES ({placeholders})", rows)
+                self.conn.execute("PRAGMA user_version = 0")
+        return len(rows)
+
+    def import_pending(self):
+        """True bila workbook lama belum berhasil di-import ke store ini."""
+        with self.lock:
+            return self.conn.execute("PRAGMA user_version").fetchone()[0] == 1
+
+    def mark_import_pending(self):
+        with self.lock:
+            self.conn.execute("PRAGMA user_version = 1")
+            self.conn.commit()
+
+    def export_excel(self, excel_path):
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM metadata ORDER BY rowid").fetchall()
+        import pandas as pd
+        df = pd.DataFrame(rows, columns=self.columns)
+        tmp_path = excel_path + '.tmp.xlsx'
+        df.to_excel(tmp_path, index=False, engine='openpyxl')
+        os.replace(tmp_path, excel_path)
+        return len(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class Catalog:
+    """Katalog ber-index untuk record yang sudah diunduh, satu baris per output.
+
+    Kunci: accession (atau region), format, path dan filename.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS records (
+            accession TEXT, format TEXT, filename TEXT, base TEXT, version TEXT, organism TEXT,
+            country TEXT, collection_date TEXT, path TEXT, metadata TEXT, added REAL,
+            PRIMARY KEY (accession, format, path, filename))""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_base ON records (base)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_version ON records (version)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_organism ON records (organism COLLATE NOCASE)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_country ON records (country COLLATE NOCASE)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_collection_date ON records (collection_date)")
+        self.conn.commit()
+
+    def row(self, metadata, path, fmt):
+        accession = metadata['Accession']
+        version = none_if_na(metadata.get('Version'))
+        # Region (ACC:start-stop) tidak mewakili record utuh: tanpa base
+        base = None if ':' in accession else (version or accession).split('.')[0]
+        country = none_if_na(metadata.get('Country'))
+        filename = metadata.get('Filename') or os.path.basename(path)
+        return (accession, fmt, filename, base, version, none_if_na(metadata.get('Organism')),
+                country.split(':')[0].strip() if country else None,
+                normalize_date(metadata.get('Collection_Date')), path,
+                json.dumps(metadata, default=str), time.time())
+
+    def add(self, metadata, path, fmt):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              self.row(metadata, path, fmt))
+            self.conn.commit()
+
+    def rebuild(self, entries):
+        """Mengganti isi katalog dengan ``(metadata, path, format)`` dari ``entries`` dalam satu transaksi."""
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM records")
+                self.conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                      (self.row(metadata, path, fmt) for metadata, path, fmt in entries))
+            return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def locate(self, key, fmt):
+        """``(path, metadata)`` setiap output ``fmt`` untuk accession, versi atau region; terbaru dulu."""
+        with self.lock:
+            rows = self.conn.execute("SELECT path, metadata FROM records WHERE accession = ? AND format = ? "
+                                     "ORDER BY added DESC", (key, fmt)).fetchall()
+            if not rows and ':' not in key:
+                column = 'version' if '.' in key else 'base'
+                rows = self.conn.execute(f"SELECT path, metadata FROM records WHERE {column} = ? AND format = ? "
+                                         "AND base IS NOT NULL ORDER BY added DESC", (key, fmt)).fetchall()
+        return [(path, json.loads(metadata)) for path, metadata in rows]
+
+    def query(self, organism=None, country=None, date_from=None, date_to=None, limit=None):
+        """Metadata record yang cocok dengan semua filter, urut per accession.
+
+        ``*`` di akhir organism/country berarti prefix; batas tanggal inklusif dan boleh parsial.
+        """
+        clauses = []
+        params = []
+        for column, value in (('organism', organism), ('country', country)):
+            if value is None:
+                continue
+            if value.endswith('*'):
+                # Range pada index NOCASE, bukan LIKE, supaya tetap lewat index
+                clauses.append(f"{column} >= ? COLLATE NOCASE AND {column} < ? COLLATE NOCASE")
+                params.extend((value[:-1], value[:-1] + '\uffff'))
+            else:
+                clauses.append(f"{column} = ? COLLATE NOCASE")
+                params.append(value)
+        if date_from:
+            clauses.append("collection_date >= ?")
+            params.append(normalize_date(date_from) or date_from)
+        if date_to:
+            # Batas atas parsial mencakup seluruh periodenya: "2020" s/d "2020-12-31"
+            clauses.append("collection_date <= ?")
+            params.append((normalize_date(date_to) or date_to) + '\uffff')
+        sql = "SELECT metadata, format, path FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY accession, format"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        results = []
+        for metadata, fmt, path in rows:
+            metadata = json.loads(metadata)
+            metadata['Format'] = fmt
+            metadata['Path'] = path
+            results.append(metadata)
+        return results
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def none_if_na(value):
+    return None if value in (None, '', 'NA') else str(value)
+
+
+def normalize_date(value):
+    """Tanggal koleksi GenBank sebagai ISO (``YYYY``, ``YYYY-MM`` atau ``YYYY-MM-DD``), atau None."""
+    value = none_if_na(value)
+    if value is None:
+        return None
+    value = value.split('/')[0].split('T')[0].strip()
+    match = re.match(r'^([0-9]{4})(?:-([0-9]{2}))?(?:-([0-9]{2}))?$', value)
+    if match:
+        return '-'.join(part for part in match.groups() if part)
+    match = re.match(r'^(?:([0-9]{1,2})-)?([A-Za-z]{3})-([0-9]{4})$', value)
+    if match and match.group(2).lower() in MONTHS:
+        day, month, year = match.groups()
+        date = f"{year}-{MONTHS[month.lower()]}"
+        return f"{date}-{int(day):02d}" if day else date
+    return None
+
+
+class RecordCache:
+    """Cache LRU record GenBank mentah di disk, per accession.version."""
+
+    def __init__(self, folder, max_bytes):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conn = sqlite3.connect(os.path.join(folder, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS records (
+            version TEXT PRIMARY KEY, accession TEXT, revision INTEGER, size INTEGER, last_access REAL)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_accession ON records (accession)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_last_access ON records (last_access)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM records").fetchone()[0]
+
+    def path(self, version):
+        return os.path.join(self.folder, version + ".gb")
+
+    def get(self, key):
+        """Path record untuk ``key`` (tanpa versi: versi tertinggi), atau None."""
+        with self.lock:
+            if '.' in key:
+                row = self.conn.execute("SELECT version FROM records WHERE version = ?", (key,)).fetchone()
+            else:
+                row = self.conn.execute("SELECT version FROM records WHERE accession = ? "
+                                        "ORDER BY revision DESC LIMIT 1", (key,)).fetchone()
+            if row is None or not os.path.exists(self.path(row[0])):
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE records SET last_access = ? WHERE version = ?", (time.time(), row[0]))
+            self.conn.commit()
+            self.hits += 1
+            return self.path(row[0])
+
+    def put(self, version, tmp_path):
+        accession, _, revision = version.partition('.')
+        size = os.path.getsize(tmp_path)
+        with self.lock:
+            os.replace(tmp_path, self.path(version))
+            old = self.conn.execute("SELECT size FROM records WHERE version = ?", (version,)).fetchone()
+            if old:
+                self.total_bytes -= old[0]
+            self.conn.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+                              (version, accession, int(revision) if revision.isdigit() else 0, size, time.time()))
+            self.total_bytes += size
+            self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes:
+            row = self.conn.execute("SELECT version, size FROM records ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            self.conn.execute("DELETE FROM records WHERE version = ?", (row[0],))
+            try:
+                os.remove(self.path(row[0]))
+            except OSError:
+                pass
+            self.total_bytes -= row[1]
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': self.total_bytes
+            }
+
+
+class ShardStore:
+    """Shard gzip berukuran terbatas berisi banyak record, dengan index SQLite."""
+
+    def __init__(self, folder, max_bytes):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.files = {}  # ext -> (nama shard, file handle) yang sedang diisi
+        self.conn = sqlite3.connect(os.path.join(folder, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS records (
+            id TEXT PRIMARY KEY, accession TEXT, shard TEXT, offset INTEGER, length INTEGER, size INTEGER)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_accession ON records (accession)")
+        self.conn.commit()
+
+    def open_shard(self, ext, rotate=False):
+        suffix = f".{ext}.gz"
+        numbers = [int(name[8:-len(suffix)]) for name in os.listdir(self.folder)
+                   if name.startswith("records-") and name.endswith(suffix) and name[8:-len(suffix)].isdigit()]
+        number = max(numbers, default=0) + (1 if rotate and numbers else 0)
+        shard = f"records-{number:05d}{suffix}"
+        path = os.path.join(self.folder, shard)
+        if os.path.exists(path):
+            # Member yang terpotong (proses mati saat menyalin) tidak ada di index: buang
+            end = self.conn.execute("SELECT MAX(offset + length) FROM records WHERE shard = ?",
+                                    (shard,)).fetchone()[0] or 0
+            if os.path.getsize(path) > end:
+                os.truncate(path, end)
+        if ext in self.files:
+            self.files[ext][1].close()
+        self.files[ext] = (shard, open(path, 'ab'))
+        return self.files[ext]
+
+    def add(self, record_id, accession, src_path, ext):
+        """Menambahkan file ``src_path`` sebagai satu gzip member; returns nama shard."""
+        fd, member_path = tempfile.mkstemp(dir=self.folder, suffix='.part')
+        try:
+            # Kompresi di luar lock supaya worker lain tetap bisa menulis
+            with os.fdopen(fd, 'wb') as raw, open(src_path, 'rb') as src:
+                with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as member:
+                    shutil.copyfileobj(src, member, 1024 * 1024)
+            size = os.path.getsize(src_path)
+            length = os.path.getsize(member_path)
+            with self.lock:
+                shard, f = self.files.get(ext) or self.open_shard(ext)
+                offset = f.tell()
+                if offset and offset + length > self.max_bytes:
+                    shard, f = self.open_shard(ext, rotate=True)
+                    offset = f.tell()
+                with open(member_path, 'rb') as member:
+                    shutil.copyfileobj(member, f, 1024 * 1024)
+                f.flush()
+                self.conn.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                                  (record_id, accession, shard, offset, length, size))
+                self.conn.commit()
+        finally:
+            if os.path.exists(member_path):
+                os.remove(member_path)
+        return shard
+
+    def locate(self, key):
+        """``(shard, offset, length)`` untuk ID record atau accession, atau None."""
+        with self.lock:
+            row = self.conn.execute("SELECT shard, offset, length FROM records WHERE id = ?", (key,)).fetchone()
+            if row is None and '.' in key:
+                row = self.conn.execute("SELECT shard, offset, length FROM records WHERE accession = ? "
+                                        "ORDER BY rowid DESC LIMIT 1", (key,)).fetchone()
+            elif row is None:
+                # Accession tanpa versi: versi terbaru, lewat range scan pada index
+                row = self.conn.execute("SELECT shard, offset, length FROM records "
+                                        "WHERE accession >= ? AND accession < ? "
+                                        "ORDER BY rowid DESC LIMIT 1", (key + '.', key + '/')).fetchone()
+        return row
+
+    def records(self):
+        """Semua ``(id, accession.version, shard)`` di index."""
+        with self.lock:
+            return self.conn.execute("SELECT id, accession, shard FROM records ORDER BY rowid").fetchall()
+
+    def read(self, key):
+        """Teks satu record; hanya member record itu yang didekompres."""
+        row = self.locate(key)
+        if row is None:
+            return None
+        shard, offset, length = row
+        with open(os.path.join(self.folder, shard), 'rb') as f:
+            f.seek(offset)
+            return gzip.decompress(f.read(length)).decode('utf-8')
+
+    def close(self):
+        with self.lock:
+            for _, f in self.files.values():
+                f.close()
+            self.files = {}
+            self.conn.close()
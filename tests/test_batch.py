@@ -0,0 +1,29 @@
+import contextlib
+import os
+
+from ncbi_fetcher import SequenceFetcher
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'fasta')
+
+
+def test_gi_input_matches_returned_version(tmp_path, monkeypatch):
+    fetcher = SequenceFetcher(output_folder=str(tmp_path), use_cache=False)
+    with open(os.path.join(FIXTURES, 'exact_width.gb'), 'r', encoding='utf-8') as f:
+        gb_lines = f.read().splitlines()
+    summaries = []
+
+    def esummary(accession_ids, db='nuccore'):
+        summaries.append(list(accession_ids))
+        return [{'uid': '2045678901', 'caption': 'MZ987654', 'accessionversion': 'MZ987654.2', 'slen': 420}]
+
+    @contextlib.contextmanager
+    def open_stream(accession_ids, rettype, timeout=60):
+        assert accession_ids == ['2045678901']
+        yield iter(gb_lines)
+
+    monkeypatch.setattr(fetcher, 'esummary', esummary)
+    monkeypatch.setattr(fetcher, 'open_stream', open_stream)
+    results = fetcher.process_chunk(['2045678901'])
+    assert summaries == [['2045678901']]
+    filename = results['2045678901']
+    assert isinstance(filename, str) and (tmp_path / filename).exists()
@@ -0,0 +1,77 @@
+import contextlib
+import os
+
+import pytest
+
+from ncbi_fetcher import SequenceFetcher
+
+# Pasangan GenBank + FASTA dengan layout efetch rettype=gb / rettype=fasta
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'fasta')
+WITH_ORIGIN = ('multiline_definition', 'exact_width')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', WITH_ORIGIN)
+def test_gb_to_fasta_matches_ncbi(name):
+    gb_text = read_fixture(name + '.gb').decode('utf-8')
+    fasta = SequenceFetcher().gb_to_fasta(gb_text)
+    assert fasta.encode('utf-8') == read_fixture(name + '.fasta')
+
+
+@pytest.mark.parametrize('name', WITH_ORIGIN)
+def test_streamed_fasta_matches_ncbi(tmp_path, name):
+    fetcher = SequenceFetcher(output_folder=str(tmp_path))
+    lines = iter(read_fixture(name + '.gb').decode('utf-8').splitlines())
+    part, metadata, has_sequence = fetcher.stream_record(lines, 'fasta', accession_id=name)
+    assert has_sequence
+    filename = fetcher.save_data(part, metadata, 'fasta', has_sequence)
+    assert (tmp_path / filename).read_bytes() == read_fixture(name + '.fasta')
+
+
+def test_con_record_uses_ncbi_fasta(tmp_path, monkeypatch):
+    fetcher = SequenceFetcher(output_folder=str(tmp_path))
+    gb_text = read_fixture('con_record.gb').decode('utf-8')
+    ncbi_fasta = read_fixture('con_record.fasta')
+    assert fetcher.gb_to_fasta(gb_text) is None
+
+    requests = []
+
+    @contextlib.contextmanager
+    def post_stream(name, params, timeout=60):
+        requests.append((name, params['id'], params['rettype']))
+        yield iter(ncbi_fasta.decode('utf-8').splitlines())
+
+    monkeypatch.setattr(fetcher, 'post_stream', post_stream)
+    part, metadata, has_sequence = fetcher.stream_record(iter(gb_text.splitlines()), 'fasta',
+                                                         accession_id='CP123450.1')
+    assert not has_sequence
+    filename = fetcher.save_data(part, metadata, 'fasta', has_sequence)
+    assert requests == [('efetch', 'CP123450.1', 'fasta')]
+    assert (tmp_path / filename).read_bytes() == ncbi_fasta
+
+
+@pytest.mark.parametrize('ext', ['fasta', 'genbank'])
+@pytest.mark.parametrize('cut', ['half', 'no_terminator', 'missing_line', 'header_only'])
+def test_truncated_record_is_not_saved(tmp_path, ext, cut):
+    fetcher = SequenceFetcher(output_folder=str(tmp_path))
+    lines = read_fixture('multiline_definition.gb').decode('utf-8').splitlines()
+    origin = next(i for i, line in enumerate(lines) if line.startswith('ORIGIN'))
+    if cut == 'half':
+        lines = lines[:(origin + len(lines)) // 2]
+    elif cut == 'no_terminator':
+        lines = lines[:-1]
+    elif cut == 'missing_line':
+        del lines[origin + 2]
+    else:
+        lines = lines[:origin - 1]
+    with pytest.raises(ConnectionError):
+        fetcher.stream_record(iter(lines), ext, accession_id='multiline_definition')
+    if cut != 'missing_line':
+        # Jumlah basa baru diperiksa saat parse, di process pool
+        with pytest.raises(ConnectionError):
+            fetcher.download_raw_record(iter(lines), str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,63 @@
+import pytest
+
+from ncbi_fetcher.inputs import InputReader, parse_accessions
+
+
+@pytest.mark.parametrize('value, expected', [
+    # Accession polos, RefSeq dan WGS
+    ('JN188370.1', ['JN188370.1']),
+    ('mn908947.3', ['MN908947.3']),
+    ('JN188370', ['JN188370']),
+    ('NC_045512.2', ['NC_045512.2']),
+    ('NZ_CP012345.1', ['NZ_CP012345.1']),
+    ('NZ_AAAA01000001.1', ['NZ_AAAA01000001.1']),
+    ('AAAA01000001.1', ['AAAA01000001.1']),
+    ('JAAAAA010000001.1', ['JAAAAA010000001.1']),
+    ('  "MN908947.3"  ', ['MN908947.3']),
+    ('MN908947.3,NC_045512.2', ['MN908947.3', 'NC_045512.2']),
+    # GI
+    ('1798174254', ['1798174254']),
+    # Bentuk URL
+    ('https://www.ncbi.nlm.nih.gov/nuccore/MN908947.3', ['MN908947.3']),
+    ('https://www.ncbi.nlm.nih.gov/nuccore/mn908947.3?report=fasta', ['MN908947.3']),
+    ('www.ncbi.nlm.nih.gov/nuccore/NZ_CP012345.1/', ['NZ_CP012345.1']),
+    ('https://www.ncbi.nlm.nih.gov/nuccore/1798174254', ['1798174254']),
+    ('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=nuccore&id=MN908947.3&rettype=fasta',
+     ['MN908947.3']),
+    ('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=nuccore&id=JN188370.1,NC_045512.2',
+     ['JN188370.1', 'NC_045512.2']),
+    ('https://www.ncbi.nlm.nih.gov/sviewer/viewer.fcgi?val=MN908947.3&report=gbwithparts', ['MN908947.3']),
+    # Region
+    ('NC_000001.11:1000000-2000000', ['NC_000001.11:1000000-2000000']),
+    ('NC_045512.2:21563-25384:-', ['NC_045512.2:21563-25384:-']),
+    ('NC_045512.2:21563-25384:2', ['NC_045512.2:21563-25384:-']),
+    ('NC_045512.2:21563-25384:+', ['NC_045512.2:21563-25384']),
+    ('NZ_CP012345.1:1-500', ['NZ_CP012345.1:1-500']),
+    ('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=nuccore&id=NC_045512.2'
+     '&seq_start=21563&seq_stop=25384&strand=2', ['NC_045512.2:21563-25384:-']),
+    ('https://www.ncbi.nlm.nih.gov/nuccore/NC_045512.2?from=100&to=200', ['NC_045512.2:100-200']),
+])
+def test_parse_accessions(value, expected):
+    assert parse_accessions(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    'not an accession',
+    'NC_',
+    'MN908947.3.1',
+    'NC_045512.2:200-100',
+    'NC_045512.2:0-100',
+    'https://example.org/page',
+    'https://www.ncbi.nlm.nih.gov/nuccore/',
+])
+def test_parse_accessions_rejects(value):
+    with pytest.raises(ValueError):
+        parse_accessions(value)
+
+
+def test_reader_counts_duplicates_and_invalid():
+    reader = InputReader(lines=['MN908947.3', '# komentar', '', 'mn908947.3',
+                                'https://www.ncbi.nlm.nih.gov/nuccore/MN908947.3', 'NZ_CP012345.1', 'bogus line'])
+    assert list(reader) == ['MN908947.3', 'NZ_CP012345.1']
+    assert (reader.unique, reader.duplicates, reader.invalid) == (2, 2, 1)
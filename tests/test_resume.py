@@ -0,0 +1,74 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from benchmarks.mock_eutils import MockEutils
+from ncbi_fetcher import BatchJournal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def journal_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        return f.read().count(b'\n')
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGKILL'), reason="needs SIGKILL")
+def test_killed_batch_resumes_without_loss_or_repeats(tmp_path):
+    mock = MockEutils(latency=0.05).start()
+    try:
+        ids = [f"KL{i:06d}.1" for i in range(60)]
+        input_file = tmp_path / 'ids.txt'
+        input_file.write_text('\n'.join(ids) + '\n')
+        out = tmp_path / 'out'
+        journal = str(out / 'batch_journal.log')
+        command = [sys.executable, '-m', 'ncbi_fetcher', '-i', str(input_file), '-o', str(out),
+                   '--no-cache', '--batch-size', '3', '--workers', '1', '--api-key', 'test',
+                   '--eutils-url', mock.url]
+
+        proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 60
+        while journal_lines(journal) < 15:
+            assert proc.poll() is None, "batch finished before it could be killed"
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        proc.send_signal(signal.SIGKILL)
+        proc.wait()
+        first_run = list(mock.fetched)
+        replayed = BatchJournal(journal)
+        replayed.close()
+        done = set(replayed.done)
+        assert 15 <= len(done) < len(ids)
+
+        mock.reset_counts()
+        assert subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL).returncode == 0
+        second_run = mock.fetched
+    finally:
+        mock.stop()
+
+    # Record yang sudah di journal tidak diminta lagi; sisanya diminta tepat sekali
+    assert not done & set(second_run)
+    assert len(second_run) == len(set(second_run))
+    assert set(first_run) | set(second_run) == set(ids)
+    assert sorted(p.name for p in out.glob('*.fasta')) == sorted(f"{i}_Escherichia_coli.fasta" for i in ids)
+    assert not os.path.exists(journal)
+
+
+def test_replay_drops_torn_last_line(tmp_path):
+    path = tmp_path / 'batch_journal.log'
+    path.write_bytes(b"AB000001.1\tAB000001.1.fasta\nAB000002.1\tAB000002.1.fa")
+    journal = BatchJournal(str(path))
+    assert journal.done == {'AB000001.1': 'AB000001.1.fasta'}
+    journal.record('AB000003.1', 'AB000003.1.fasta')
+    journal.close()
+    assert path.read_bytes() == b"AB000001.1\tAB000001.1.fasta\nAB000003.1\tAB000003.1.fasta\n"
+    reopened = BatchJournal(str(path))
+    reopened.close()
+    assert reopened.done == {'AB000001.1': 'AB000001.1.fasta', 'AB000003.1': 'AB000003.1.fasta'}
@@ -0,0 +1,48 @@
+import http.client
+import socket
+
+import pytest
+import requests
+from urllib3.exceptions import ProtocolError
+
+from ncbi_fetcher.retry import PERMANENT, THROTTLED, TRANSIENT, CircuitOpenError, classify_error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+@pytest.mark.parametrize('exc, kind', [
+    (http_error(429), THROTTLED),
+    (http_error(408), TRANSIENT),
+    (http_error(500), TRANSIENT),
+    (http_error(503), TRANSIENT),
+    (http_error(400), PERMANENT),
+    (http_error(404), PERMANENT),
+    (requests.ConnectionError("refused"), TRANSIENT),
+    (requests.ConnectTimeout("connect"), TRANSIENT),
+    (requests.ReadTimeout("read"), TRANSIENT),
+    (requests.exceptions.ChunkedEncodingError("cut"), TRANSIENT),
+    (requests.exceptions.ContentDecodingError("gzip"), TRANSIENT),
+    (ProtocolError("reset"), TRANSIENT),
+    (ConnectionResetError(), TRANSIENT),
+    (http.client.RemoteDisconnected("closed"), TRANSIENT),
+    (socket.timeout(), TRANSIENT),
+    (requests.exceptions.MissingSchema("no schema"), PERMANENT),
+    (requests.exceptions.InvalidSchema("no adapter"), PERMANENT),
+    (requests.exceptions.InvalidURL("bad url"), PERMANENT),
+    (requests.RequestException("other"), PERMANENT),
+    (CircuitOpenError("open"), PERMANENT),
+    (ValueError("parse"), PERMANENT),
+    (OSError("disk full"), PERMANENT),
+])
+def test_classify_error(exc, kind):
+    assert classify_error(exc) == kind
+
+
+def test_bad_eutils_url_is_permanent():
+    with pytest.raises(requests.RequestException) as info:
+        requests.post('127.0.0.1:9/efetch.fcgi', timeout=1)
+    assert classify_error(info.value) == PERMANENT